@@ -1,21 +1,148 @@
 # driver.py
 # Driver class to encapsulate driver data and status
 
+import numpy as np
 import pandas as pd
 from config import LAP_TIME_GAP_THRESHOLD
 
+# Columns kept in the array store and their compact dtypes
+COLUMN_DTYPES = {
+    't': np.float64,
+    'race_time': np.float64,
+    'dist': np.float64,
+    'X': np.float32,
+    'Y': np.float32,
+    'Speed': np.float32,
+    'Throttle': np.float32,
+    'Brake': np.bool_,
+    'nGear': np.int8,
+    'RPM': np.float32,
+    'DRS': np.int8,
+}
+
 
 class Driver:
     #Represents an F1 driver with telemetry and status
     
+    __slots__ = ('code', 'team', 'columns', 'lap_starts', 'total_laps', 't_offset',
+                 'status', 'dnf_time', 'dnf_lap', 'dnf_position')
+    
     def __init__(self, code, team, telemetry):
+        self._setup(code, team, self.to_columns(telemetry),
+                    telemetry.attrs.get("lap_starts", [0.0]))
+        self.t_offset = telemetry.attrs.get("t_offset", 0.0)
+    
+    @classmethod
+    def from_columns(cls, code, team, columns, lap_starts):
+        """Build a driver straight from column arrays (e.g. memory-mapped)"""
+        driver = cls.__new__(cls)
+        driver._setup(code, team, columns, lap_starts)
+        return driver
+    
+    def _setup(self, code, team, columns, lap_starts):
         self.code = code
         self.team = team
-        self.telemetry = telemetry
+        self.columns = columns
+        self.lap_starts = np.asarray(lap_starts, dtype=np.float64)
+        self.total_laps = len(self.lap_starts)
+        self.t_offset = 0.0
         self.status = "ACTIVE"
         self.dnf_time = None
         self.dnf_lap = None
         self.dnf_position = None
+    
+    @staticmethod
+    def to_columns(telemetry):
+        """Split a processed telemetry DataFrame into contiguous typed arrays"""
+        columns = {}
+        for name, dtype in COLUMN_DTYPES.items():
+            if name not in telemetry.columns:
+                continue
+            series = telemetry[name]
+            if not np.issubdtype(np.dtype(dtype), np.floating):
+                series = series.fillna(0)
+            columns[name] = np.ascontiguousarray(series.to_numpy(dtype=dtype))
+        return columns
+    
+    def append_telemetry(self, telemetry, lap_starts=()):
+        """Grow the driver with a later chunk of raw telemetry
+        
+        The chunk's 't' column and lap_starts must be on the same clock as
+        the telemetry the driver was created from.
+        """
+        cols = self.columns
+        t = telemetry["t"].to_numpy(dtype=np.float64) - self.t_offset
+        
+        # Chunks are padded at the edges, so drop samples we already have
+        keep = t > cols["t"][-1]
+        if not keep.any():
+            return
+        tel = telemetry[keep].reset_index(drop=True)
+        t = t[keep]
+        
+        # Distance carries on from the last known sample
+        x = np.concatenate(([cols["X"][-1]], tel["X"].to_numpy(dtype=np.float64)))
+        y = np.concatenate(([cols["Y"][-1]], tel["Y"].to_numpy(dtype=np.float64)))
+        tel["t"] = t
+        tel["race_time"] = t
+        tel["dist"] = cols["dist"][-1] + np.cumsum(np.hypot(np.diff(x), np.diff(y)))
+        
+        new_columns = self.to_columns(tel)
+        self.columns = {name: np.concatenate((cols[name], new_columns[name]))
+                        for name in cols if name in new_columns}
+        
+        new_starts = [start - self.t_offset for start in lap_starts
+                      if start - self.t_offset > self.lap_starts[-1]]
+        if new_starts:
+            self.lap_starts = np.concatenate((self.lap_starts, new_starts))
+            self.total_laps = len(self.lap_starts)
+    
+    @property
+    def telemetry(self):
+        """Telemetry as a DataFrame, built on demand for analysis"""
+        tel = pd.DataFrame(self.columns)
+        tel.attrs["lap_starts"] = self.lap_starts.tolist()
+        tel.attrs["total_laps"] = self.total_laps
+        return tel
+    
+    @property
+    def t(self):
+        """Sample times in seconds from the start of the replay"""
+        return self.columns["t"]
+    
+    @property
+    def end_time(self):
+        """Time of the last telemetry sample"""
+        return float(self.columns["t"][-1])
+    
+    def __len__(self):
+        return len(self.columns["t"])
+    
+    def has_channel(self, name):
+        """Check if a telemetry channel was recorded"""
+        return name in self.columns
+    
+    def channel(self, name):
+        """Full array for a telemetry channel"""
+        return self.columns[name]
+    
+    def window(self, start_time, end_time):
+        """Slice of the samples with start_time <= t <= end_time"""
+        t = self.columns["t"]
+        return slice(int(t.searchsorted(start_time)),
+                     int(t.searchsorted(end_time, side='right')))
+
+    def window_values(self, name, window, default=0):
+        """View of a channel over a window, or a constant if it is missing"""
+        column = self.columns.get(name)
+        if column is None:
+            return np.full(window.stop - window.start, default, dtype=np.float32)
+        return column[window]
+
+    def value_at(self, name, idx, default=0):
+        """Single sample of a channel, or default if the channel is missing"""
+        column = self.columns.get(name)
+        return default if column is None else column[idx]
         
     def is_dnf(self):
         #Check if driver has DNF'd
@@ -29,38 +156,44 @@ class Driver:
         
     def get_position_at_time(self, current_time):
         """Get driver's position data at a specific time"""
+        cols = self.columns
+        last = len(cols["t"]) - 1
         if self.is_dnf() and current_time > self.dnf_time:
             # Return last known position
-            idx = len(self.telemetry) - 1
+            idx = last
         else:
-            idx = min(self.telemetry["t"].searchsorted(current_time), 
-                     len(self.telemetry) - 1)
+            idx = min(int(cols["t"].searchsorted(current_time)), last)
         
         return {
             'idx': idx,
-            'x': self.telemetry.loc[idx, 'X'],
-            'y': self.telemetry.loc[idx, 'Y'],
-            'dist': self.telemetry.loc[idx, 'dist'],
-            'race_time': self.telemetry.loc[idx, 'race_time'],
-            'laps_done': sum(current_time >= t for t in self.telemetry.attrs["lap_starts"])
+            'x': cols['X'][idx],
+            'y': cols['Y'][idx],
+            'dist': cols['dist'][idx],
+            'race_time': cols['race_time'][idx],
+            'laps_done': self.get_current_lap(current_time)
         }
     
     def get_current_lap(self, current_time):
         """Get the current lap number"""
-        return sum(current_time >= t for t in self.telemetry.attrs["lap_starts"])
+        # Number of lap starts at or before current_time
+        return int(self.lap_starts.searchsorted(current_time, side='right'))
     
     def has_finished(self, current_time):
         """Check if driver has finished their telemetry data"""
-        return current_time > self.telemetry["t"].iloc[-1]
+        return current_time > self.columns["t"][-1]
     
     @staticmethod
-    def process_telemetry(telemetry_list):
+    def process_telemetry(telemetry_list, lap_starts=None):
         """Process raw telemetry data into usable format"""
         if not telemetry_list:
             return None
             
-        tel = pd.concat(telemetry_list, ignore_index=True)
-        tel["t"] -= tel["t"].iloc[0]
+        if len(telemetry_list) == 1:
+            tel = telemetry_list[0].reset_index(drop=True)
+        else:
+            tel = pd.concat(telemetry_list, ignore_index=True)
+        t0 = tel["t"].iloc[0]
+        tel["t"] -= t0
         tel["race_time"] = tel["t"]
         
         # Calculate distance
@@ -68,15 +201,17 @@ class Driver:
         dy = tel["Y"].diff()
         tel["dist"] = (dx**2 + dy**2).pow(0.5).fillna(0).cumsum()
         
-        # Detect lap starts
-        lap_starts = [0.0]
-        for i in range(1, len(tel)):
-            time_gap = tel["t"].iloc[i] - tel["t"].iloc[i - 1]
+        if lap_starts is not None:
+            # Lap boundaries supplied by the lap table
+            lap_starts = [max(start - t0, 0.0) for start in lap_starts] or [0.0]
+        else:
             # Detect lap completion by large time gaps
-            if time_gap > LAP_TIME_GAP_THRESHOLD:
-                lap_starts.append(tel["t"].iloc[i])
+            t = tel["t"].to_numpy()
+            gap_after = np.flatnonzero(np.diff(t) > LAP_TIME_GAP_THRESHOLD)
+            lap_starts = [0.0] + t[gap_after + 1].tolist()
         
         tel.attrs["lap_starts"] = lap_starts
         tel.attrs["total_laps"] = len(lap_starts)
+        tel.attrs["t_offset"] = float(t0)
         
         return tel
\ No newline at end of file
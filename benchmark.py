@@ -0,0 +1,230 @@
+# benchmark.py
+# Offline performance benchmarks on a synthetic full-grid race
+#
+#   python benchmark.py                  # run and print p50/p95/p99
+#   python benchmark.py --save           # ... and store them as the baseline
+#   python benchmark.py --compare        # ... and fail on regressions against it
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+import matplotlib
+from matplotlib.figure import Figure
+from Driver import Driver
+from data_loader import SessionLoader
+from timeline import RaceTimeline
+from gaps import GapTimeline
+from speed_trace import SpeedHeatmap
+from profiler import FrameProfiler
+from render import FrameRenderer
+from synthetic import synthetic_grid, SyntheticSource, NATIVE_RATE
+from config import FPS, BENCHMARK_BASELINE, BENCHMARK_TOLERANCE
+
+logger = logging.getLogger(__name__)
+
+# Sampling rates benchmarked: FastF1's 4 Hz channels and the merged native stream
+RATES = {
+    '4hz': (4.0, False),
+    'native': (NATIVE_RATE, True),
+}
+
+# Pool size for the parallel loading benchmarks
+LOAD_POOL = 4
+
+# Differences below this are timer noise, not regressions
+NOISE_FLOOR_MS = 0.05
+
+
+def timed(profiler, name, calls):
+    """Time each zero-argument call under one benchmark name"""
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        profiler.record(name, time.perf_counter() - start)
+
+
+def run_rate(profiler, label, drivers=20, laps=60, rate=4.0, jitter=False,
+             repeat=200, seed=0):
+    #Every benchmark on one synthetic race
+    def name(what):
+        return f"{label}/{what}"
+
+    circuit, grid = synthetic_grid(drivers, laps, rate, jitter, seed=seed)
+    track = circuit.track()
+    logger.info(f"[{label}] {len(grid)} drivers, {laps} laps, "
+                f"{sum(len(tel) for _, _, tel, _ in grid) / len(grid):.0f} samples per driver")
+
+    # Loading
+    timed(profiler, name("Driver.process_telemetry"),
+          [lambda tel=tel, starts=starts: Driver.process_telemetry([tel], starts)
+           for _, _, tel, starts in grid])
+    loader = SessionLoader(source=SyntheticSource(circuit, grid), use_cache=False)
+    loader.load_session()
+    codes = loader.get_available_drivers()
+    # Whole-field loading serially and on each LOAD_EXECUTOR, nothing cached
+    for setup, workers, executor in (("serial", 1, 'thread'),
+                                     (f"{LOAD_POOL} threads", LOAD_POOL, 'thread'),
+                                     (f"{LOAD_POOL} processes", LOAD_POOL, 'process')):
+        timed(profiler, name(f"load_all_drivers ({setup})"),
+              [lambda workers=workers, executor=executor:
+               loader.load_all_drivers(codes, 'RACE', workers, executor)] * 3)
+    field = [Driver(code, team, Driver.process_telemetry([tel], starts))
+             for code, team, tel, starts in grid]
+    max_time = max(d.end_time for d in field)
+    timed(profiler, name("RaceTimeline build"),
+          [lambda: RaceTimeline(field, max_time=max_time)] * 3)
+    timed(profiler, name("GapTimeline build"),
+          [lambda: GapTimeline(field, max_time=max_time)] * 3)
+
+    # Lookups at random replay times
+    rng = np.random.default_rng(seed)
+    times = rng.uniform(0, max_time, repeat)
+    timed(profiler, name("Driver.get_position_at_time"),
+          [lambda d=d, t=t: d.get_position_at_time(t) for t in times for d in field])
+
+    # Widgets, fed consecutive frames from mid-race like playback does
+    renderer = FrameRenderer(field, track)
+    replay = renderer.replay
+    first = int(max_time * 0.4 * FPS)
+    frames = range(first, first + repeat)
+    snapshots = [replay.timeline.snapshot(index / FPS) for index in frames]
+    timed(profiler, name("RaceTimeline.snapshot"),
+          [lambda t=index / FPS: replay.timeline.snapshot(t) for index in frames])
+
+    for component in replay.components:
+        timed(profiler, name(f"{type(component).__name__}.update"),
+              [lambda c=component, s=s: c.update(s) for s in snapshots])
+
+    leaderboard = replay.leaderboard
+    gap_timeline, leaderboard.gap_timeline = leaderboard.gap_timeline, None
+    timed(profiler, name("Leaderboard.update (live ranking)"),
+          [lambda s=s: leaderboard.update(s) for s in snapshots])
+    leaderboard.gap_timeline = gap_timeline
+
+    replay.track_map.toggle_trails()
+    timed(profiler, name("TrackMap.update (trails)"),
+          [lambda s=s: replay.track_map.update(s) for s in snapshots])
+    replay.track_map.toggle_trails()
+
+    heatmap = SpeedHeatmap(Figure().add_subplot(), field[0], track)
+    timed(profiler, name("SpeedHeatmap.update"),
+          [lambda s=s: heatmap.update(s) for s in snapshots])
+
+    # Whole frames on the headless Agg canvas
+    timed(profiler, name("RaceReplay frame (blitted)"),
+          [lambda index=index: renderer.frame(index) for index in frames])
+    canvas = replay.fig.canvas
+    timed(profiler, name("RaceReplay frame (full draw)"),
+          [lambda index=index: (replay.update(index / FPS), canvas.draw())
+           for index in frames[:max(repeat // 20, 3)]])
+
+
+def run_benchmarks(drivers=20, laps=60, rates=tuple(RATES), repeat=200, seed=0):
+    """Run every benchmark; returns {name: p50/p95/p99/mean/count}"""
+    profiler = FrameProfiler(window=repeat * drivers)
+    for label in rates:
+        rate, jitter = RATES[label]
+        run_rate(profiler, label, drivers, laps, rate, jitter, repeat, seed)
+    return profiler.stats()
+
+
+def environment():
+    #What the numbers were measured on
+    return {
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'matplotlib': matplotlib.__version__,
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def print_results(results, baseline=None):
+    #Table of p50/p95/p99, with the p50 change against a baseline
+    print(f"\n{'benchmark':<48}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          + (f"{'vs base':>10}" if baseline else ""))
+    for bench, s in results.items():
+        line = f"{bench:<48}{s['p50_ms']:10.3f}{s['p95_ms']:10.3f}{s['p99_ms']:10.3f}"
+        base = (baseline or {}).get(bench)
+        if base and base['p50_ms'] > 0:
+            line += f"{s['p50_ms'] / base['p50_ms']:9.2f}x"
+        print(line)
+
+
+def regressions(results, baseline, tolerance=BENCHMARK_TOLERANCE):
+    """Benchmarks whose p50 grew by more than tolerance times the baseline"""
+    slower = []
+    for bench, s in results.items():
+        base = baseline.get(bench)
+        if base is None:
+            continue
+        if (s['p50_ms'] > base['p50_ms'] * tolerance
+                and s['p50_ms'] - base['p50_ms'] > NOISE_FLOOR_MS):
+            slower.append(bench)
+    return slower
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline replay benchmarks on a synthetic race")
+    parser.add_argument("--drivers", type=int, default=20, help="cars on the grid")
+    parser.add_argument("--laps", type=int, default=60, help="race distance")
+    parser.add_argument("--rate", choices=list(RATES), action="append",
+                        help="sampling to benchmark (default: all)")
+    parser.add_argument("--repeat", type=int, default=200,
+                        help="frames/lookups timed per benchmark")
+    parser.add_argument("--save", nargs="?", const=BENCHMARK_BASELINE, metavar="PATH",
+                        help=f"store the results as a baseline (default {BENCHMARK_BASELINE})")
+    parser.add_argument("--compare", nargs="?", const=BENCHMARK_BASELINE, metavar="PATH",
+                        help="compare against a baseline and exit 1 on regressions")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
+    args = parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        base_setup = baseline['setup']
+        if (base_setup['drivers'], base_setup['laps']) != (args.drivers, args.laps):
+            logger.warning(f"Baseline was measured on {base_setup['drivers']} drivers, "
+                           f"{base_setup['laps']} laps")
+
+    results = run_benchmarks(args.drivers, args.laps, args.rate or tuple(RATES), args.repeat)
+    print_results(results, baseline and baseline['results'])
+
+    if args.save:
+        report = {
+            'setup': {'drivers': args.drivers, 'laps': args.laps, 'repeat': args.repeat},
+            'environment': environment(),
+            'results': results,
+        }
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n Baseline saved to {args.save}")
+
+    if baseline:
+        slower = regressions(results, baseline['results'])
+        if slower:
+            print(f"\n {len(slower)} regressions over {BENCHMARK_TOLERANCE:.2f}x the baseline p50:")
+            for bench in slower:
+                print(f"   {bench}")
+            return 1
+        print("\n No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
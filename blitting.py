@@ -0,0 +1,92 @@
+# blitting.py
+# Redraws only the artists that change on top of cached static backgrounds
+
+import time
+from matplotlib.transforms import Bbox
+
+
+class BlitManager:
+    #Caches static backgrounds and blits the animated artists over them
+    #
+    # Artists are grouped by axes (axes that overlap share one region). A
+    # region is only restored and redrawn when one of its artists changed,
+    # which matplotlib marks as stale; otherwise the canvas keeps last
+    # frame's pixels. Any full redraw (first show, resize, slider range
+    # change) goes through on_draw and refreshes the backgrounds.
+    #
+    # Overlays are static artists (the trace legends) that must stay above
+    # the animated ones. Drawing them again costs tens of ms, so their pixels
+    # are saved at the full draw and pasted back after each redraw instead.
+
+    def __init__(self, canvas, artists, overlays=(), pad=10):
+        self.canvas = canvas
+        self.overlays = list(overlays)
+        self.pad = pad  # Pixels around each axes, for markers drawn over its edge
+        self.groups = {}
+        self.layers = []
+        self.draw_costs = {}  # Seconds spent drawing each artist in the last update
+        for artist in artists:
+            artist.set_animated(True)
+            self.groups.setdefault(artist.axes, []).append(artist)
+
+        self._cid = canvas.mpl_connect("draw_event", self.on_draw)
+
+    def on_draw(self, event):
+        #Full draws skip animated artists, so the canvas is a clean background here
+        covers = [(box, self.canvas.copy_from_bbox(box))
+                  for box in (overlay.get_window_extent().padded(1)
+                              for overlay in self.overlays if overlay.get_visible())]
+        self.layers = [(region, artists, self.canvas.copy_from_bbox(region),
+                        [pixels for box, pixels in covers if region.overlaps(box)])
+                       for region, artists in self._regions()]
+        for _, artists, _, region_covers in self.layers:
+            self._draw(artists)
+            self._cover(region_covers)
+
+    def _regions(self):
+        #One region per axes, merging overlapping axes so neither erases the other
+        regions = []
+        for ax, artists in self.groups.items():
+            region = ax.bbox.padded(self.pad)
+            merged = True
+            while merged:
+                merged = False
+                for other_region, other_artists in regions:
+                    if other_region.overlaps(region):
+                        regions.remove((other_region, other_artists))
+                        region = Bbox.union([other_region, region])
+                        artists = other_artists + artists
+                        merged = True
+                        break
+            regions.append((region, artists))
+        return regions
+
+    def _draw(self, artists):
+        fig = self.canvas.figure
+        costs = self.draw_costs
+        for artist in artists:
+            start = time.perf_counter()
+            fig.draw_artist(artist)
+            costs[artist] = time.perf_counter() - start
+            artist.stale = False  # Hidden artists skip drawing and would stay stale
+
+    def _cover(self, covers):
+        #Paste the saved overlay pixels back over the animated artists
+        for pixels in covers:
+            self.canvas.restore_region(pixels)
+
+    def update(self):
+        """Redraw the regions whose animated artists changed"""
+        self.draw_costs = {}
+        if not self.layers:
+            # Nothing drawn yet; the first full draw fills the cache
+            self.canvas.draw_idle()
+            return
+
+        for region, artists, background, covers in self.layers:
+            if not any(artist.stale for artist in artists):
+                continue
+            self.canvas.restore_region(background)
+            self._draw(artists)
+            self._cover(covers)
+            self.canvas.blit(region)
@@ -21,8 +21,47 @@ SECTOR_MARKERS = ['o', 's', '^']
 
 # Animation settings
 FPS = 30
+TIMELINE_CHUNK_SECONDS = 600  # Replay time a streamed race's timeline grows by at once
 SHOW_TRAILS = False
-TRAIL_LENGTH = 100
+TRAIL_LENGTH = 100  # Telemetry samples drawn behind each car
+TRAIL_FADE = True  # Trails fade out towards their tail
+BLIT_RENDERING = True  # Redraw only changing artists over a cached background
+PLAYBACK_REPORT_SECONDS = 10  # Log effective FPS and dropped frames this often (0 = off)
+
+# Widget update scheduling: each widget refreshes at its own rate within a frame budget
+SCHEDULED_UPDATES = True
+FRAME_BUDGET = 0.8  # Share of each frame the widget updates and redraws may use
+# Refreshes per second and initial cost estimate (ms, update + redraw); measured costs take over
+WIDGET_UPDATE_RATES = {
+    'track_map': (FPS, 8.0),  # Always refreshed first
+    'lap_counter': (2, 2.0),
+    'leaderboard': (4, 25.0),
+    'speed_trace': (15, 6.0),
+    'throttle_brake': (15, 9.0),
+    'gear_trace': (5, 6.0),
+    'rpm_trace': (5, 5.0),
+    'speedometer': (10, 3.0),
+    'drs_indicator': (4, 2.0),
+}
+
+# Telemetry panels built by the full layout; the others are never created
+TELEMETRY_PANELS = ('speed_trace', 'throttle_brake', 'gear_trace', 'rpm_trace',
+                    'speedometers', 'drs_indicator')
+
+# Modules imported in the background while the session prompts wait (() = off).
+# Never pyplot or a widget module: GUI backends must be imported on the main thread
+PRELOAD_IMPORTS = ('data_loader', 'fastf1', 'matplotlib.widgets')
+
+# Frame-time profiling: rolling p50/p95/p99 of each widget update and the canvas draw
+FRAME_PROFILING = False
+FRAME_PROFILE_WINDOW = 300  # Frames kept for the rolling percentiles
+FRAME_PROFILE_OVERLAY = True  # Show the percentiles in the corner of the replay
+FRAME_PROFILE_REPORT = 'frame_profile.json'  # Written when the window closes (None = log only)
+
+# Headless rendering (python main.py --render OUTPUT)
+RENDER_WORKERS = None  # None uses every core
+RENDER_DPI = 100
+RENDER_CHUNK_SECONDS = 30  # Replay seconds per work item
 
 # Figure settings
 TRACK_FIGURE_SIZE = (10, 8)
@@ -31,6 +70,28 @@ COMPARISON_FIGURE_SIZE = (12, 6)
 # Cache settings
 CACHE_DIR = 'cache'
 
+# Processed telemetry cache (memory-mapped arrays, one directory per driver)
+PROCESSED_CACHE_DIR = 'cache/processed'
+USE_PROCESSED_CACHE = True
+PROCESSED_CACHE_VERSION = 1  # Bump when telemetry processing changes
+
+# Load laps and results first, and car/position data only once telemetry is needed
+STAGED_SESSION_LOADING = True
+
+# Streaming replay: start once the first laps are loaded (RACE mode)
+STREAMING_REPLAY = False
+STREAM_CHUNK_LAPS = 2
+STREAM_START_LAPS = 3
+
+# Parallel telemetry loading. 'thread' only overlaps I/O (downloads, cache
+# reads): the pandas merge and processing hold the GIL. 'process' reads each
+# driver's frames in the main process and processes them on other cores.
+# The load_all_drivers rows of python benchmark.py time serial, thread and
+# process loading; on the synthetic 20-car race processing is ~2 ms a driver,
+# less than shipping the frames to a process, and serial was fastest
+LOAD_WORKERS = 1  # 1 loads drivers one after another
+LOAD_EXECUTOR = 'thread'
+
 # DNF detection threshold (percentage of race completion)
 DNF_THRESHOLD = 0.95  # Consider DNF if finished 5% early
 
@@ -51,4 +112,15 @@ UI_COLORS = {
 
 # Gap thresholds (in seconds)
 GAP_CLOSE_THRESHOLD = 1.0
-GAP_LARGE_THRESHOLD = 10.0
\ No newline at end of file
+GAP_LARGE_THRESHOLD = 10.0
+
+# Precomputed gap timeline sampling step (seconds)
+GAP_TIMELINE_RESOLUTION = 0.25
+
+# Offline benchmarks (python benchmark.py)
+BENCHMARK_BASELINE = 'benchmark_baseline.json'
+BENCHMARK_TOLERANCE = 1.25  # p50 slowdown reported as a regression
+
+# Season cache warming (python warm_cache.py YEAR)
+WARM_WORKERS = 2  # Sessions preprocessed at once
+WARM_PROGRESS_FILE = 'cache/warm_progress.json'
@@ -1,45 +1,57 @@
 
-import os
-import fastf1 as f1
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from itertools import repeat
 from Driver import Driver
-from config import CACHE_DIR
+from telemetry_cache import TelemetryCache
+from sources import FastF1Source
+from config import LOAD_WORKERS, LOAD_EXECUTOR, USE_PROCESSED_CACHE, STREAM_CHUNK_LAPS
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Outcome of loading one driver; only FAILED is worth retrying
+LOADED, NO_DATA, FAILED = "loaded", "no data", "failed"
+
 
 class SessionLoader:
-    #Loads and processes F1 session data
+    #Loads and processes F1 session data from a telemetry source (FastF1 by default)
     
-    def __init__(self, year, round_number, session_type):
-        self.year = year
-        self.round_number = round_number
-        self.session_type = session_type
-        self.session = None
-        self.laps = None
-        
-        # Setup cache
-        os.makedirs(CACHE_DIR, exist_ok=True)
-        f1.Cache.enable_cache(CACHE_DIR)
+    def __init__(self, year=None, round_number=None, session_type=None,
+                 use_cache=USE_PROCESSED_CACHE, source=None):
+        self.source = source or FastF1Source(year, round_number, session_type)
+        self.year = self.source.year
+        self.round_number = self.source.round_number
+        self.session_type = self.source.session_type
+        self.driver_teams = None
+        self.load_status = {}  # driver code -> LOADED/NO_DATA/FAILED of the last load_all_drivers
+        self.cache = TelemetryCache() if use_cache else None
         
     def load_session(self):
-        #Load the F1 session
+        #Load the session, or only its driver list if it is in the processed cache
+        if self.cache is not None:
+            self.driver_teams = self.cache.load_session_info(
+                self.year, self.round_number, self.session_type)
+            if self.driver_teams:
+                logger.info(f"Found {self.year} Round {self.round_number} "
+                            f"{self.session_type} in processed telemetry cache")
+                return True
+        
+        if not self.source.load():
+            return False
         try:
-            logger.info(f"Loading {self.year} Round {self.round_number} {self.session_type}")
-            self.session = f1.get_session(self.year, self.round_number, self.session_type)
-            self.session.load()
-            self.laps = self.session.laps
-            logger.info("Session loaded successfully")
-            return True
+            self.driver_teams = self.source.driver_teams()
         except Exception as e:
-            logger.error(f"Failed to load session: {e}")
+            logger.error(f"Failed to read the driver list: {e}")
             return False
+        
+        if self.cache is not None:
+            self.cache.save_session_info(self.year, self.round_number,
+                                         self.session_type, self.driver_teams)
+        return True
     
     def get_available_drivers(self):
         #Get list of available driver codes
-        if self.laps is None:
-            return []
-        return sorted(self.laps['Driver'].unique().tolist())
+        return sorted(self.driver_teams) if self.driver_teams else []
     
     def validate_drivers(self, driver_codes):
         #Validate that driver codes exist in the session
@@ -53,76 +65,147 @@ class SessionLoader:
         return True
     
     def load_driver_telemetry(self, driver_code, replay_mode):
-        #Load telemetry for a specific driver
+        #Load telemetry for a specific driver; None if it has none or failed to load
+        return self.load_driver_result(driver_code, replay_mode)[1]
+    
+    def load_driver_result(self, driver_code, replay_mode):
+        #(status, driver), telling a driver without telemetry from a failed load
+        driver = self._cached_driver(driver_code, replay_mode)
+        if driver is not None:
+            return LOADED, driver
+        
+        status, data = self._read_driver(driver_code, replay_mode)
+        if status != LOADED:
+            return status, None
+        tel_list, lap_starts, team = data
         try:
-            drv_laps = self.laps.pick_driver(driver_code)
-            tel_list = []
-            offset = 0.0
-            
-            if replay_mode == "FASTEST":
-                lap = drv_laps.pick_fastest()
-                if lap is None:
-                    logger.warning(f"No valid lap for {driver_code}")
-                    return None
-                    
-                t = lap.get_telemetry().dropna(subset=["X", "Y", "Time"])
-                t["t"] = t["Time"].dt.total_seconds()
-                tel_list.append(t)
-                
-            else:  # RACE mode
-                for _, lap in drv_laps.iterlaps():
-                    try:
-                        t = lap.get_telemetry().dropna(subset=["X", "Y", "Time"])
-                    except Exception as e:
-                        logger.debug(f"Skipping lap for {driver_code}: {e}")
-                        continue
-                        
-                    if t.empty:
-                        continue
-                        
-                    t["t"] = t["Time"].dt.total_seconds() + offset
-                    offset = t["t"].iloc[-1]
-                    tel_list.append(t)
-            
-            if not tel_list:
-                logger.warning(f"No telemetry data for {driver_code}")
-                return None
-                
-            # Process telemetry
-            telemetry = Driver.process_telemetry(tel_list)
-            
-            # Get team info
-            team = drv_laps["Team"].iloc[0]
-            
-            logger.info(f"Loaded {driver_code} ({team}) - {len(telemetry)} data points")
-            return Driver(driver_code, team, telemetry)
-            
+            telemetry = Driver.process_telemetry(tel_list, lap_starts)
         except Exception as e:
-            logger.error(f"Error loading telemetry for {driver_code}: {e}")
+            logger.error(f"Error processing telemetry for {driver_code}: {e}")
+            return FAILED, None
+        return LOADED, self._new_driver(driver_code, team, telemetry, replay_mode)
+    
+    def _cached_driver(self, driver_code, replay_mode):
+        if self.cache is None:
             return None
+        driver = self.cache.load_driver(self.year, self.round_number, self.session_type,
+                                        replay_mode, driver_code)
+        if driver is not None:
+            logger.info(f"Loaded {driver_code} ({driver.team}) from cache - {len(driver)} data points")
+        return driver
     
-    def load_all_drivers(self, driver_codes, replay_mode):
-        #Load telemetry for multiple drivers
-        drivers = []
+    def _read_driver(self, driver_code, replay_mode):
+        #Raw telemetry from the source as (status, (telemetry frames, lap starts, team))
+        try:
+            data = self.source.driver_telemetry(driver_code, replay_mode)
+        except Exception as e:
+            logger.error(f"Error loading telemetry for {driver_code}: {e}")
+            return FAILED, None
+        if data is None:
+            logger.warning(f"No telemetry data for {driver_code}")
+            return NO_DATA, None
+        return LOADED, data
+    
+    def _new_driver(self, driver_code, team, telemetry, replay_mode):
+        #Wrap processed telemetry in a Driver and cache it
+        logger.info(f"Loaded {driver_code} ({team}) - {len(telemetry)} data points")
+        driver = Driver(driver_code, team, telemetry)
+        
+        # A column-limited load would pass for a full one in the shared cache
+        if self.cache is not None and self.source.columns is None:
+            try:
+                self.cache.save_driver(self.year, self.round_number, self.session_type,
+                                       replay_mode, driver)
+            except OSError as e:
+                logger.warning(f"Could not cache telemetry for {driver_code}: {e}")
+        return driver
+    
+    def stream_race_telemetry(self, driver_codes, chunk_laps=STREAM_CHUNK_LAPS):
+        #Yield (last lap, {code: (telemetry, lap_starts, team)}) a few laps at a time
+        self.source.request(driver_codes)
+        return self.source.race_chunks(driver_codes, chunk_laps)
+    
+    def load_all_drivers(self, driver_codes, replay_mode, workers=LOAD_WORKERS,
+                         executor=LOAD_EXECUTOR):
+        #Load telemetry for multiple drivers, in parallel when workers > 1
+        self.source.request(driver_codes)
+        workers = min(workers, len(driver_codes))
         
-        for code in driver_codes:
-            driver = self.load_driver_telemetry(code, replay_mode)
-            if driver:
-                drivers.append(driver)
+        if workers > 1:
+            results = self._load_parallel(driver_codes, replay_mode, workers, executor)
+        else:
+            results = [self.load_driver_result(code, replay_mode)
+                       for code in driver_codes]
+        
+        # Results keep the requested order; drivers not loaded come back as None
+        self.load_status = {code: status for code, (status, _) in zip(driver_codes, results)}
+        drivers = [driver for _, driver in results if driver is not None]
         
         logger.info(f"Successfully loaded {len(drivers)}/{len(driver_codes)} drivers")
         return drivers
     
+    def _load_parallel(self, driver_codes, replay_mode, workers, executor):
+        #Load drivers on a thread or process pool
+        logger.info(f"Loading {len(driver_codes)} drivers with {workers} {executor} workers")
+        
+        if executor == "process":
+            return self._process_parallel(driver_codes, replay_mode, workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.load_driver_result, driver_codes, repeat(replay_mode)))
+    
+    def _process_parallel(self, driver_codes, replay_mode, workers):
+        #Read each driver's frames here and process them on a process pool
+        #
+        # Workers only ever see one driver's own frames, so the session is
+        # loaded once, in this process, whatever the worker count.
+        results = {}
+        processing = {}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for code in driver_codes:
+                driver = self._cached_driver(code, replay_mode)
+                if driver is not None:
+                    results[code] = (LOADED, driver)
+                    continue
+                status, data = self._read_driver(code, replay_mode)
+                if status != LOADED:
+                    results[code] = (status, None)
+                    continue
+                # Processing overlaps reading the next driver
+                tel_list, lap_starts, team = data
+                processing[code] = (executor.submit(Driver.process_telemetry, tel_list, lap_starts),
+                                    team)
+            
+            for code, (future, team) in processing.items():
+                try:
+                    telemetry = future.result()
+                except Exception as e:
+                    logger.error(f"Error processing telemetry for {code}: {e}")
+                    results[code] = (FAILED, None)
+                    continue
+                results[code] = (LOADED, self._new_driver(code, team, telemetry, replay_mode))
+        return [results[code] for code in driver_codes]
+    
     def get_reference_track(self):
-        #Get track coordinates from fastest lap
-        if self.laps is None:
+        #Get track coordinates of a reference lap
+        if self.cache is not None:
+            track_tel = self.cache.load_track(self.year, self.round_number, self.session_type)
+            if track_tel is not None:
+                return track_tel
+        
+        if self.driver_teams is None:
             return None
             
         try:
-            ref_driver = self.get_available_drivers()[0]
-            ref_lap = self.laps.pick_driver(ref_driver).pick_fastest()
-            track_tel = ref_lap.get_telemetry().dropna(subset=["X", "Y"])
-            return track_tel
+            track_tel = self.source.reference_track()
         except Exception as e:
             logger.error(f"Failed to get reference track: {e}")
-            return None
\ No newline at end of file
+            return None
+        if track_tel is None:
+            return None
+        
+        if self.cache is not None:
+            try:
+                self.cache.save_track(self.year, self.round_number, self.session_type, track_tel)
+            except OSError as e:
+                logger.warning(f"Could not cache reference track: {e}")
+        return track_tel
\ No newline at end of file
@@ -0,0 +1,121 @@
+# gaps.py
+# Batched running order and gap-to-leader calculations for the whole field
+
+import numpy as np
+import pandas as pd
+from config import TEAM_COLORS, GAP_TIMELINE_RESOLUTION
+
+
+def rank_field(laps_done, dist, race_time, leader_curve):
+    """Order, laps down and time gaps for every driver
+
+    laps_done, dist and race_time hold one entry per driver, either for a
+    single instant (1-D) or for many (steps x drivers). leader_curve maps
+    a driver index to the (dist, race_time) arrays of that driver's
+    telemetry, used for the distance->time lookup of whoever leads.
+    Returns (order, laps_down, gap_seconds) with order listing driver
+    indices from the leader backwards.
+    """
+    single = np.ndim(dist) == 1
+    laps_done, dist, race_time = (np.atleast_2d(a) for a in (laps_done, dist, race_time))
+
+    # Sort by laps done, then distance (stable, like the original tuple sort)
+    order = np.lexsort((-dist, -laps_done))
+    leader = order[:, 0]
+    steps = np.arange(len(order))
+    laps_down = laps_done[steps, leader][:, None] - laps_done
+
+    # Time the leader passed each driver's current distance, one batched
+    # lookup per driver that leads at some point
+    gap_seconds = np.empty(dist.shape)
+    for j in np.unique(leader):
+        sel = leader == j
+        leader_dist, leader_time = leader_curve(j)
+        at_dist = np.minimum(leader_dist.searchsorted(dist[sel]), len(leader_dist) - 1)
+        leader_time_at_dist = np.where(dist[sel] <= leader_dist[-1],
+                                       leader_time[at_dist], race_time[sel, j][:, None])
+        gap_seconds[sel] = race_time[sel] - leader_time_at_dist
+
+    if single:
+        return order[0], laps_down[0], gap_seconds[0]
+    return order, laps_down, gap_seconds
+
+
+class GapTimeline:
+    #Running order, gap to leader and interval for a whole race, built once
+
+    def __init__(self, drivers, resolution=GAP_TIMELINE_RESOLUTION, max_time=None):
+        self.drivers = drivers
+        self.resolution = resolution
+        if max_time is None:
+            max_time = max(d.end_time for d in drivers)
+        self.times = np.arange(int(max_time / resolution) + 1) * resolution
+
+        # Sample every driver on the grid the same way the replay does
+        shape = (len(self.times), len(drivers))
+        laps_done = np.empty(shape, dtype=np.intp)
+        dist = np.empty(shape)
+        race_time = np.empty(shape)
+        for j, driver in enumerate(drivers):
+            idx = np.minimum(driver.t.searchsorted(self.times), len(driver) - 1)
+            dist[:, j] = driver.channel("dist")[idx]
+            race_time[:, j] = driver.channel("race_time")[idx]
+            laps_done[:, j] = driver.lap_starts.searchsorted(self.times, side='right')
+
+        order, laps_down, gap = rank_field(laps_done, dist, race_time, self._curve)
+        self.order = order
+        self.laps_down = laps_down.astype(np.int16)
+        self.gap = gap.astype(np.float32)
+
+        # 1-based running position and interval to the car ahead, per driver
+        self.position = np.empty(shape, dtype=np.int16)
+        np.put_along_axis(self.position, order, np.arange(1, len(drivers) + 1)[None, :], axis=1)
+
+        gap_in_order = np.take_along_axis(self.gap, order, axis=1)
+        interval_in_order = np.diff(gap_in_order, axis=1, prepend=np.nan)
+        self.interval = np.empty_like(self.gap)
+        np.put_along_axis(self.interval, order, interval_in_order, axis=1)
+
+    def _curve(self, j):
+        return self.drivers[j].channel("dist"), self.drivers[j].channel("race_time")
+
+    def step_index(self, current_time):
+        """Grid step closest to a replay time"""
+        step = int(round(current_time / self.resolution))
+        return min(max(step, 0), len(self.times) - 1)
+
+    def at(self, current_time):
+        """(order, laps_down, gap_seconds) at a replay time, like rank_field"""
+        step = self.step_index(current_time)
+        return self.order[step], self.laps_down[step], self.gap[step]
+
+    def to_dataframe(self):
+        """Long-format table (time, driver, position, gap, interval, laps down)"""
+        n_steps, n_drivers = self.gap.shape
+        return pd.DataFrame({
+            'time': np.repeat(self.times, n_drivers),
+            'driver': np.tile([d.code for d in self.drivers], n_steps),
+            'position': self.position.ravel(),
+            'gap': self.gap.ravel(),
+            'interval': self.interval.ravel(),
+            'laps_down': self.laps_down.ravel(),
+        })
+
+    def save_chart(self, path, max_gap=60.0):
+        """Write a gap-to-leader chart without needing a GUI backend"""
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=(12, 6))
+        ax = fig.add_subplot()
+        minutes = self.times / 60
+        for j, driver in enumerate(self.drivers):
+            ax.plot(minutes, self.gap[:, j], label=driver.code, linewidth=1.2,
+                    color=TEAM_COLORS.get(driver.team, "#888888"))
+
+        ax.set_title("Gap to Leader", fontsize=12, fontweight='bold')
+        ax.set_xlabel("Race time (min)")
+        ax.set_ylabel("Gap (s)")
+        ax.set_ylim(max_gap, -1)
+        ax.grid(True, alpha=0.3, linestyle='--')
+        ax.legend(loc='lower left', fontsize=8, ncol=5)
+        fig.savefig(path, dpi=120, bbox_inches='tight')
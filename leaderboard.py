@@ -1,16 +1,20 @@
 
 
+import numpy as np
 import matplotlib.pyplot as plt
+from gaps import rank_field
 from config import TEAM_COLORS, UI_COLORS, GAP_CLOSE_THRESHOLD, GAP_LARGE_THRESHOLD
 
 
 class Leaderboard:
 #Manages leaderboard display and calculations
     
-    def __init__(self, ax, drivers):
+    def __init__(self, ax, drivers, gap_timeline=None):
         self.ax = ax
         self.drivers = drivers
+        self.gap_timeline = gap_timeline  # Precomputed gaps, read by time when set
         self.setup_axes()
+        self.create_artists()
         
     def setup_axes(self):
         #Setup the leaderboard axes
@@ -18,32 +22,14 @@ class Leaderboard:
         self.ax.set_ylim(0, 1)
         self.ax.axis("off")
         
-    def calculate_gap(self, driver, leader_driver, current_time):
-        #Calculate gap between driver and leader
-        driver_pos = driver.get_position_at_time(current_time)
-        leader_pos = leader_driver.get_position_at_time(current_time)
-        
+    def format_gap(self, laps_down, gap_seconds):
+        #Format the gap between a driver and the leader
         # Check for laps down
-        if driver_pos['laps_done'] < leader_pos['laps_done']:
-            laps_down = leader_pos['laps_done'] - driver_pos['laps_done']
+        if laps_down > 0:
             gap_str = f"+{laps_down}L"
             gap_color = UI_COLORS['gap_laps_down']
             return gap_str, gap_color
         
-        # Same lap - calculate time gap
-        current_dist = driver_pos['dist']
-        leader_tel = leader_driver.telemetry
-        leader_dist_array = leader_tel["dist"].values
-        leader_time_array = leader_tel["race_time"].values
-        
-        if current_dist <= leader_dist_array[-1]:
-            leader_at_dist_idx = leader_tel["dist"].searchsorted(current_dist)
-            leader_at_dist_idx = min(leader_at_dist_idx, len(leader_tel) - 1)
-            leader_time_at_dist = leader_time_array[leader_at_dist_idx]
-            gap_seconds = driver_pos['race_time'] - leader_time_at_dist
-        else:
-            gap_seconds = driver_pos['race_time'] - leader_time_array[leader_pos['idx']]
-        
         # Format gap
         if gap_seconds < 0.05:
             gap_str = "±0.0s"
@@ -60,21 +46,55 @@ class Leaderboard:
         
         return gap_str, gap_color
     
-    def update(self, current_time):
+    def update(self, snapshot):
         """Update the leaderboard display"""
-        self.ax.clear()
-        self.setup_axes()
+        if not self.drivers:
+            return
         
-        # Create snapshots of all drivers
-        snapshots = []
-        for driver in self.drivers:
-            pos = driver.get_position_at_time(current_time)
-            snapshots.append((driver, pos['laps_done'], pos['dist']))
-        
-        # Sort by laps done, then distance
-        snapshots.sort(key=lambda x: (-x[1], -x[2]))
-        
-        # Draw title
+        # Order and gaps for the whole field, precomputed or in one batch
+        if self.gap_timeline is not None:
+            order, laps_down, gap_seconds = self.gap_timeline.at(snapshot.time)
+        else:
+            rows = np.fromiter((snapshot.row(d) for d in self.drivers), 
+                               dtype=np.intp, count=len(self.drivers))
+            order, laps_down, gap_seconds = rank_field(
+                snapshot.laps_done[rows], snapshot.dist[rows], snapshot.race_time[rows],
+                self._leader_curve
+            )
+        
+        # Restyle each position slot whose driver or gap changed
+        for i, d in enumerate(order):
+            driver = self.drivers[d]
+            is_dnf = driver.is_dnf()
+            
+            # Get gap
+            if i == 0:
+                gap_str = "LEADER"
+                gap_color = UI_COLORS['leader']
+            elif is_dnf:
+                gap_str = f"DNF (L{driver.dnf_lap})"
+                gap_color = UI_COLORS['dnf']
+            else:
+                gap_str, gap_color = self.format_gap(laps_down[d], gap_seconds[d])
+            
+            state = (driver.code, is_dnf, gap_str, gap_color)
+            if self.row_states[i] == state:
+                continue
+            self.row_states[i] = state
+            
+            row = self.rows[i]
+            self._update_position_box(row, i, driver, is_dnf)
+            self._update_position_number(row, driver, is_dnf)
+            self._update_driver_code(row, driver, is_dnf)
+            self._update_gap(row, gap_str, gap_color, is_dnf)
+    
+    def _leader_curve(self, leader):
+        #Distance->time curve of the driver at index leader
+        driver = self.drivers[leader]
+        return driver.channel("dist"), driver.channel("race_time")
+    
+    def create_artists(self):
+        #Create the title and one row of artists per position, reused every frame
         title_bg = plt.Rectangle((0, 0.94), 1, 0.06, facecolor='black', 
                                   edgecolor='white', linewidth=2, 
                                   transform=self.ax.transAxes)
@@ -84,41 +104,44 @@ class Leaderboard:
                     transform=self.ax.transAxes)
         
         # Calculate line height
-        num_drivers = len(snapshots)
+        num_drivers = len(self.drivers)
         line_height = 0.85 / max(num_drivers, 1)
         
-        # Leader reference
-        leader_driver = snapshots[0][0] if snapshots else None
-        
-        # Draw each position
-        for i, (driver, laps_done, dist) in enumerate(snapshots):
+        self.rows = []
+        self.row_states = [None] * num_drivers
+        for i in range(num_drivers):
             y_pos = 0.90 - (i * line_height)
-            is_dnf = driver.is_dnf()
             
-            # Get gap
-            if i == 0:
-                gap_str = "LEADER"
-                gap_color = UI_COLORS['leader']
-            elif is_dnf:
-                gap_str = f"DNF (L{driver.dnf_lap})"
-                gap_color = UI_COLORS['dnf']
-            else:
-                gap_str, gap_color = self.calculate_gap(driver, leader_driver, current_time)
+            box = plt.Rectangle((0.02, y_pos - line_height*0.4), 0.96, line_height*0.8, 
+                                linewidth=2, transform=self.ax.transAxes)
+            self.ax.add_patch(box)
             
-            # Draw position box
-            self._draw_position_box(y_pos, line_height, i, driver, is_dnf)
+            number = self.ax.text(0.08, y_pos, f"{i+1}", fontsize=12, fontweight='bold', 
+                                  ha='center', va='center', transform=self.ax.transAxes,
+                                  bbox=dict(boxstyle='circle', edgecolor='white', 
+                                            linewidth=1.5))
             
-            # Draw position number
-            self._draw_position_number(y_pos, i, driver, is_dnf)
+            strike, = self.ax.plot([0.18, 0.32], [y_pos, y_pos], color='red', 
+                                   linewidth=2, transform=self.ax.transAxes, zorder=10,
+                                   visible=False)
             
-            # Draw driver code
-            self._draw_driver_code(y_pos, driver, is_dnf)
+            code = self.ax.text(0.25, y_pos, "", fontsize=11, fontweight='bold', 
+                                ha='left', va='center', transform=self.ax.transAxes)
             
-            # Draw gap
-            self._draw_gap(y_pos, gap_str, gap_color, is_dnf)
+            gap = self.ax.text(0.90, y_pos, "", fontweight='bold', ha='right', 
+                               va='center', transform=self.ax.transAxes,
+                               bbox=dict(pad=2))
+            
+            self.rows.append({'box': box, 'number': number, 'strike': strike,
+                              'code': code, 'gap': gap})
+    
+    def animated_artists(self):
+        """Row artists restyled by update, for blitting"""
+        return [artist for row in self.rows
+                for artist in (row['box'], row['number'], row['strike'], row['code'], row['gap'])]
     
-    def _draw_position_box(self, y_pos, line_height, position, driver, is_dnf):
-        #Draw background box for position
+    def _update_position_box(self, row, position, driver, is_dnf):
+        #Style background box for position
         if is_dnf:
             bg_color = UI_COLORS['dnf']
             bg_alpha = 0.3
@@ -135,48 +158,31 @@ class Leaderboard:
         color = TEAM_COLORS.get(driver.team, "#888888")
         edge_color = UI_COLORS['dnf'] if is_dnf else color
         
-        pos_box = plt.Rectangle((0.02, y_pos - line_height*0.4), 0.96, line_height*0.8, 
-                                facecolor=bg_color, alpha=bg_alpha, 
-                                edgecolor=edge_color, linewidth=2,
-                                transform=self.ax.transAxes)
-        self.ax.add_patch(pos_box)
+        row['box'].set(facecolor=bg_color, edgecolor=edge_color, alpha=bg_alpha)
     
-    def _draw_position_number(self, y_pos, position, driver, is_dnf):
-        #Draw position number circle
+    def _update_position_number(self, row, driver, is_dnf):
+        #Style position number circle
         color = TEAM_COLORS.get(driver.team, "#888888")
         pos_bg_color = UI_COLORS['dnf'] if is_dnf else color
         
-        self.ax.text(0.08, y_pos, f"{position+1}", fontsize=12, fontweight='bold', 
-                    ha='center', va='center', transform=self.ax.transAxes,
-                    bbox=dict(boxstyle='circle', facecolor=pos_bg_color, 
-                            edgecolor='white', linewidth=1.5, 
-                            alpha=0.7 if is_dnf else 1.0))
+        row['number'].get_bbox_patch().set(facecolor=pos_bg_color, 
+                                           alpha=0.7 if is_dnf else 1.0)
     
-    def _draw_driver_code(self, y_pos, driver, is_dnf):
-        #Draw driver code with strikethrough if DNF
+    def _update_driver_code(self, row, driver, is_dnf):
+        #Show driver code with strikethrough if DNF
         color = TEAM_COLORS.get(driver.team, "#888888")
         
-        if is_dnf:
-            # Draw strikethrough
-            self.ax.plot([0.18, 0.32], [y_pos, y_pos], color='red', 
-                        linewidth=2, transform=self.ax.transAxes, zorder=10)
-        
-        self.ax.text(0.25, y_pos, driver.code, fontsize=11, fontweight='bold', 
-                    color=color, ha='left', va='center', 
-                    transform=self.ax.transAxes,
-                    alpha=0.5 if is_dnf else 1.0)
+        row['strike'].set_visible(is_dnf)
+        row['code'].set(text=driver.code, color=color, alpha=0.5 if is_dnf else 1.0)
     
-    def _draw_gap(self, y_pos, gap_str, gap_color, is_dnf):
-        #Draw gap time/status
+    def _update_gap(self, row, gap_str, gap_color, is_dnf):
+        #Show gap time/status
+        gap = row['gap']
         if is_dnf:
-            self.ax.text(0.90, y_pos, gap_str, fontsize=9, fontweight='bold',
-                        color='white', ha='right', va='center', 
-                        transform=self.ax.transAxes,
-                        bbox=dict(facecolor=UI_COLORS['dnf'], alpha=0.9, 
-                                edgecolor='red', linewidth=1.5, pad=2))
+            gap.set(text=gap_str, fontsize=9, color='white')
+            gap.get_bbox_patch().set(facecolor=UI_COLORS['dnf'], alpha=0.9, 
+                                     edgecolor='red', linewidth=1.5)
         else:
-            self.ax.text(0.90, y_pos, gap_str, fontsize=10, fontweight='bold',
-                        color=gap_color, ha='right', va='center', 
-                        transform=self.ax.transAxes,
-                        bbox=dict(facecolor='black', alpha=0.7, 
-                                edgecolor=gap_color, linewidth=1, pad=2))
\ No newline at end of file
+            gap.set(text=gap_str, fontsize=10, color=gap_color)
+            gap.get_bbox_patch().set(facecolor='black', alpha=0.7, 
+                                     edgecolor=gap_color, linewidth=1)
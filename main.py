@@ -1,8 +1,12 @@
 
+import argparse
 import logging
 import sys
-from data_loader import SessionLoader
-from race_replay import RaceReplay
+from startup import StartupReport, preload
+from config import STREAMING_REPLAY, STREAM_START_LAPS, PRELOAD_IMPORTS
+
+# pandas, matplotlib and FastF1 take seconds to import, so every module that
+# pulls them in is imported where it is first needed, after the prompts
 
 # Setup logging
 logging.basicConfig(
@@ -52,9 +56,14 @@ def get_user_input():
     return year, round_num, session_type, replay_mode
 
 
-def select_drivers(loader):
+def select_drivers(loader, drivers_arg=None):
     #Allow user to select drivers
     available = loader.get_available_drivers()
+    
+    if drivers_arg:
+        drivers = available if drivers_arg == "ALL" else [d.strip() for d in drivers_arg.split(",")]
+        return drivers if loader.validate_drivers(drivers) else None
+    
     print(f"\n Available drivers: {', '.join(available)}")
     
     while True:
@@ -71,38 +80,175 @@ def select_drivers(loader):
         print(" Invalid driver codes. Try again.")
 
 
-def main():
+def parse_args(argv=None):
+    #Parse command line options
+    parser = argparse.ArgumentParser(description="F1 race replay")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="delete the processed telemetry cache and exit")
+    parser.add_argument("--prune-cache", type=float, nargs="?", const=None,
+                        default=False, metavar="DAYS",
+                        help="drop cache entries from old code versions "
+                             "(and sessions older than DAYS) and exit")
+    
+    # Session selection without prompts (all four are needed to skip them)
+    parser.add_argument("--year", type=int, help="season year")
+    parser.add_argument("--round", type=int, dest="round_num", metavar="ROUND",
+                        help="round number (1-24)")
+    parser.add_argument("--session", dest="session_type", type=str.upper,
+                        choices=["R", "Q", "P", "FP1", "FP2", "FP3", "SQ"],
+                        help="session type")
+    parser.add_argument("--mode", dest="replay_mode", type=str.upper,
+                        choices=["FASTEST", "RACE"], help="replay mode")
+    parser.add_argument("--drivers", type=str.upper, metavar="CODES",
+                        help="comma-separated driver codes, or ALL")
+    
+    # Recorded sessions (no FastF1 or network needed to replay them)
+    parser.add_argument("--record", metavar="DIR",
+                        help="export the selected drivers' telemetry to a recording and exit")
+    parser.add_argument("--recording", metavar="DIR",
+                        help="replay a recording made with --record instead of FastF1 data")
+    
+    # Headless rendering
+    parser.add_argument("--render", metavar="OUTPUT",
+                        help="render to a video file (.mp4/.mkv/.mov/.avi) or a "
+                             "directory of PNG frames instead of opening a window")
+    parser.add_argument("--start", type=float, default=0.0, metavar="SECONDS",
+                        help="render from this replay time")
+    parser.add_argument("--end", type=float, metavar="SECONDS",
+                        help="render up to this replay time (default: the end)")
+    parser.add_argument("--workers", type=int, metavar="N",
+                        help="render processes (default: every core)")
+    parser.add_argument("--export-gaps", metavar="PATH",
+                        help="write the gap timeline to a CSV file and a chart next "
+                             "to it (same name, .png) instead of opening a window")
+    
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print how long each startup phase took, up to the first frame")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     #Main application entry point
+    startup = StartupReport()
+    args = parse_args(argv)
+    
+    def report_startup():
+        if args.startup_report:
+            print("\n" + startup.text() + "\n")
+    
+    if args.clear_cache:
+        from telemetry_cache import TelemetryCache
+        TelemetryCache().clear()
+        print(" Processed telemetry cache cleared")
+        return 0
+    
+    if args.prune_cache is not False:
+        from telemetry_cache import TelemetryCache
+        removed = TelemetryCache().prune(args.prune_cache)
+        print(f" Removed {removed} cache entries")
+        return 0
+    
     try:
         print("\n  F1 RACE REPLAY SYSTEM")
         print("=" * 50)
         
         # Get configuration
-        year, round_num, session_type, replay_mode = get_user_input()
+        session_args = (args.year, args.round_num, args.session_type, args.replay_mode)
+        if args.recording:
+            # The recording names its session
+            from data_loader import SessionLoader
+            from sources import RecordedSource
+            startup.mark("import data_loader")
+            source = RecordedSource(args.recording)
+            if not source.load():
+                print(" Failed to open the recording.")
+                return 1
+            replay_mode = args.replay_mode or source.modes[0]
+            if replay_mode not in source.modes:
+                print(f" The recording has no {replay_mode} telemetry.")
+                return 1
+            loader = SessionLoader(source=source)
+        else:
+            if all(session_args):
+                year, round_num, session_type, replay_mode = session_args
+            else:
+                # The heavy imports run in the background while the user types
+                if PRELOAD_IMPORTS:
+                    preload(PRELOAD_IMPORTS, startup)
+                startup.mark("first prompt")
+                year, round_num, session_type, replay_mode = get_user_input()
+                startup.mark("session prompts", waiting=True)
+            from data_loader import SessionLoader
+            startup.mark("import data_loader")
+            loader = SessionLoader(year, round_num, session_type)
         
         # Load session
         print("\n Loading session data...")
-        loader = SessionLoader(year, round_num, session_type)
         
         if not loader.load_session():
             print(" Failed to load session. Check your internet connection.")
             return 1
         
         print(" Session loaded successfully!")
+        startup.mark("session load")
         
         # Select drivers
-        driver_codes = select_drivers(loader)
+        driver_codes = select_drivers(loader, args.drivers)
+        if not driver_codes:
+            return 1
         print(f"\n Selected {len(driver_codes)} drivers: {', '.join(driver_codes)}")
+        startup.mark("driver selection", waiting=not args.drivers)
+        
+        if args.record:
+            from sources import record_session
+            print(f"\n Recording {replay_mode} telemetry to {args.record}...")
+            recorded = record_session(loader.source, args.record, driver_codes, [replay_mode])
+            print(f" Recorded {len(recorded)} drivers to {args.record}")
+            startup.mark("recording")
+            report_startup()
+            return 0 if recorded else 1
         
         # Load driver telemetry
         print("\nLoading telemetry data...")
-        drivers = loader.load_all_drivers(driver_codes, replay_mode)
+        stream = None
+        if STREAMING_REPLAY and replay_mode == "RACE" and not (args.render or args.export_gaps):
+            # Start once the first laps are in; the rest loads in the background
+            from streaming import TelemetryStream
+            stream = TelemetryStream(loader.stream_race_telemetry(driver_codes), driver_codes)
+            drivers = stream.wait_for_laps(STREAM_START_LAPS)
+        else:
+            drivers = loader.load_all_drivers(driver_codes, replay_mode)
         
         if not drivers:
             print(" No valid driver data loaded.")
             return 1
         
         print(f" Loaded telemetry for {len(drivers)} drivers")
+        startup.mark("telemetry")
+        
+        # Resample every driver onto the shared replay time grid
+        from timeline import RaceTimeline
+        from gaps import GapTimeline
+        print("Building race timeline...")
+        timeline = RaceTimeline(drivers)
+        
+        # Running order and gaps, once all telemetry is loaded
+        gap_timeline = None
+        if stream is None:
+            print("Computing gaps...")
+            gap_timeline = GapTimeline(drivers, max_time=timeline.max_time)
+        startup.mark("timeline and gaps")
+        
+        if args.export_gaps:
+            from pathlib import Path
+            csv_path = Path(args.export_gaps)
+            chart_path = csv_path.with_suffix(".png")
+            gap_timeline.to_dataframe().to_csv(csv_path, index=False)
+            gap_timeline.save_chart(chart_path)
+            print(f" Gaps written to {csv_path} and {chart_path}")
+            startup.mark("gap export")
+            report_startup()
+            return 0
         
         # Get reference track
         print("Loading track layout...")
@@ -113,10 +259,32 @@ def main():
             return 1
         
         print(" Track layout loaded")
+        startup.mark("track layout")
+        
+        if args.render:
+            from render import render_replay
+            print(f"\n Rendering replay to {args.render}...\n")
+            render_replay(drivers, track_telemetry, args.render, start=args.start,
+                          end=args.end, gap_timeline=gap_timeline, workers=args.workers)
+            print(f" Replay rendered to {args.render}")
+            startup.mark("render")
+            report_startup()
+            return 0
         
         # Create and start race replay
+        from race_replay import RaceReplay
+        startup.mark("import race_replay")
         print("\n Starting race replay...\n")
-        replay = RaceReplay(drivers, track_telemetry)
+        replay = RaceReplay(drivers, track_telemetry, timeline=timeline, stream=stream,
+                            gap_timeline=gap_timeline)
+        startup.mark("figure and widgets")
+        
+        def first_frame(event):
+            # The first draw of the window ends startup
+            replay.fig.canvas.mpl_disconnect(first_draw)
+            startup.mark("first frame")
+            report_startup()
+        first_draw = replay.fig.canvas.mpl_connect('draw_event', first_frame)
         replay.start()
         
         return 0
@@ -0,0 +1,91 @@
+# playback.py
+# Wall-clock playback clock for the interactive replay
+
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PlaybackClock:
+    #Maps wall time to replay time at the chosen speed
+    #
+    # Replay time is anchored at the last seek, speed change or resume and
+    # advances with the wall clock from there, so a slow frame does not slow
+    # the replay down: the next frame simply shows a later time, and the
+    # frames that could not be shown in between are counted as dropped.
+
+    def __init__(self, fps, speed=1.0, report_interval=10.0, clock=time.perf_counter):
+        self.fps = fps
+        self.speed = speed
+        self.report_interval = report_interval
+        self.clock = clock
+        self.running = False
+        self.anchor_time = 0.0
+        self.anchor_wall = clock()
+
+        # Frame statistics; played is wall time between shown frames, so pauses don't count
+        self.rendered = 0
+        self.dropped = 0
+        self.played = 0.0
+        self.last_tick = None
+        self.report = [0, 0, 0.0]  # Rendered, dropped, played since the last report
+
+    def time(self):
+        """Replay time in seconds for the current wall time"""
+        if not self.running:
+            return self.anchor_time
+        return self.anchor_time + (self.clock() - self.anchor_wall) * self.speed
+
+    def seek(self, replay_time):
+        """Continue playback from replay_time"""
+        self.anchor_time = replay_time
+        self.anchor_wall = self.clock()
+
+    def set_speed(self, speed):
+        #Re-anchor first so the change applies from now on
+        self.seek(self.time())
+        self.speed = speed
+
+    def pause(self):
+        self.seek(self.time())
+        self.running = False
+        self.last_tick = None  # A pause is not a dropped frame
+
+    def resume(self):
+        self.anchor_wall = self.clock()
+        self.running = True
+
+    def tick(self):
+        """Record a shown frame and count the frames skipped since the last one"""
+        now = self.clock()
+        rendered, dropped, played = 1, 0, 0.0
+        if self.last_tick is not None:
+            played = now - self.last_tick
+            dropped = max(int(played * self.fps + 0.5) - 1, 0)
+        self.last_tick = now
+        self.rendered += rendered
+        self.dropped += dropped
+        self.played += played
+
+        report = self.report
+        report[0] += rendered
+        report[1] += dropped
+        report[2] += played
+        if self.report_interval and report[2] >= self.report_interval:
+            logger.info(f"Playback: {report[0] / report[2]:.1f} fps effective "
+                        f"(target {self.fps}), {report[1]} frames dropped")
+            self.report = [0, 0, 0.0]
+
+    def effective_fps(self):
+        """Frames shown per second of playback"""
+        return self.rendered / self.played if self.played else 0.0
+
+    def summary(self):
+        """Overall frame statistics"""
+        return {
+            'rendered': self.rendered,
+            'dropped': self.dropped,
+            'effective_fps': self.effective_fps(),
+            'target_fps': self.fps,
+        }
@@ -0,0 +1,65 @@
+# profiler.py
+# Rolling frame-time statistics for the replay loop
+
+import json
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 95, 99)
+
+
+class FrameProfiler:
+    #Keeps the last `window` timings of each labelled stage of a frame
+
+    def __init__(self, window=300):
+        self.window = window
+        self.samples = {}  # label -> ring buffer of seconds
+        self.counts = {}
+        self.totals = {}
+
+    def record(self, label, seconds):
+        """Add one timing for a stage"""
+        buffer = self.samples.get(label)
+        if buffer is None:
+            buffer = self.samples[label] = np.zeros(self.window)
+            self.counts[label] = 0
+            self.totals[label] = 0.0
+        buffer[self.counts[label] % self.window] = seconds
+        self.counts[label] += 1
+        self.totals[label] += seconds
+
+    def stats(self):
+        """Rolling p50/p95/p99 and overall mean per stage, in milliseconds"""
+        stats = {}
+        for label, buffer in self.samples.items():
+            count = self.counts[label]
+            recent = buffer[:min(count, self.window)] * 1000
+            p50, p95, p99 = np.percentile(recent, PERCENTILES)
+            stats[label] = {
+                'p50_ms': round(float(p50), 3),
+                'p95_ms': round(float(p95), 3),
+                'p99_ms': round(float(p99), 3),
+                'mean_ms': round(self.totals[label] / count * 1000, 3),
+                'count': count,
+            }
+        return stats
+
+    def overlay_text(self, limit=None):
+        """Table of the slowest stages by p95, for the overlay and the log"""
+        stats = sorted(self.stats().items(), key=lambda item: -item[1]['p95_ms'])
+        lines = [f"{'ms':<24}{'p50':>6}{'p95':>6}{'p99':>6}"]
+        for label, s in stats[:limit]:
+            lines.append(f"{label[:24]:<24}{s['p50_ms']:6.1f}{s['p95_ms']:6.1f}{s['p99_ms']:6.1f}")
+        return "\n".join(lines)
+
+    def report(self, path=None):
+        """Log the summary and optionally write it as JSON"""
+        stats = self.stats()
+        logger.info("Frame profile:\n" + self.overlay_text())
+        if path:
+            with open(path, "w") as f:
+                json.dump({'window': self.window, 'stages': stats}, f, indent=2)
+            logger.info(f"Frame profile written to {path}")
+        return stats
@@ -1,42 +1,87 @@
 # race_replay.py
 # Main race replay manager with enhanced telemetry visualizations
 
+import time
 import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
 from matplotlib.widgets import Button, Slider
+from blitting import BlitManager
 from track_map import TrackMap, LapCounter
 from leaderboard import Leaderboard
-from speed_trace import SpeedTrace, SpeedHeatmap, CurrentSpeedometer
-from telemetry import ThrottleBrakeTrace, GearTrace, RPMTrace, DRSIndicator
-from config import FPS, DNF_THRESHOLD
+from timeline import RaceTimeline
+from gaps import GapTimeline
+from playback import PlaybackClock
+from scheduler import UpdateScheduler
+from profiler import FrameProfiler
+from config import (FPS, DNF_THRESHOLD, BLIT_RENDERING, PLAYBACK_REPORT_SECONDS,
+                    SCHEDULED_UPDATES, FRAME_BUDGET, WIDGET_UPDATE_RATES,
+                    FRAME_PROFILING, FRAME_PROFILE_WINDOW, FRAME_PROFILE_OVERLAY,
+                    FRAME_PROFILE_REPORT, TELEMETRY_PANELS)
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class QuietSlider(Slider):
+    #A slider that does not redraw the figure while it is being built
+    #
+    # Slider.__init__ sets its initial value, which draws the whole figure at
+    # once on non-GUI canvases (rendering, benchmarks); drawon is turned back
+    # on once the layout is done.
+    drawon = False
+
+
 class RaceReplay:
     #Main race replay manager with comprehensive telemetry
     
-    def __init__(self, drivers, track_telemetry, enable_telemetry=True):
+    def __init__(self, drivers, track_telemetry, enable_telemetry=True, timeline=None,
+                 stream=None, gap_timeline=None):
         self.drivers = drivers
+        self.stream = stream
         self.track_telemetry = track_telemetry
         self.enable_telemetry = enable_telemetry
         self.current_time = 0
         self.is_paused = False
-        self.manual_scrub = False
         self.speed = 1.0
         
         # Calculate total duration
-        self.max_time = max(d.telemetry["t"].iloc[-1] for d in drivers)
+        self.max_time = max(d.end_time for d in drivers)
+        
+        # Shared resampled timeline, read once per frame into a snapshot
+        self.timeline = timeline or RaceTimeline(drivers, max_time=self.max_time)
+        
+        # Gaps are precomputed once all telemetry is in; live until then
+        if gap_timeline is None and stream is None:
+            gap_timeline = GapTimeline(drivers, max_time=self.max_time)
+        self.gap_timeline = gap_timeline
+        
+        # Every widget updated from the per-frame snapshot, filled by the layout
+        self.components = []
+        self.scheduler = UpdateScheduler(FPS, FRAME_BUDGET)
         
         if enable_telemetry:
             self.setup_telemetry_layout()
         else:
             self.setup_basic_layout()
         
-        # Setup animation
-        self.frames = int(self.max_time * FPS)
-        self.ani = None
+        # Setup animation: replay time follows the wall clock, not the frame count
+        self.clock = PlaybackClock(FPS, self.speed, PLAYBACK_REPORT_SECONDS)
+        self.timer = None
+        self.blitter = None
+        
+        # Slider events only move the clock; one draw per tick shows the latest
+        self.seek_timer = None
+        self.seek_pending = False
+        
+        # Frame-time profiling; with it off the loop only checks for None
+        self.profiler = None
+        self.profile_text = None
+        if FRAME_PROFILING:
+            self.setup_profiler()
+        
+        # Layout done: sliders redraw on change again, and the figure is drawn once
+        self.time_slider.drawon = True
+        self.speed_slider.drawon = True
+        self.fig.canvas.draw_idle()
         
         logger.info(f"Race replay initialized: {len(drivers)} drivers, {self.max_time:.1f}s duration")
     
@@ -52,7 +97,11 @@ class RaceReplay:
         
         # Leaderboard
         self.ax_leaderboard = self.fig.add_axes([0.76, 0.25, 0.23, 0.65])
-        self.leaderboard = Leaderboard(self.ax_leaderboard, self.drivers)
+        self.leaderboard = Leaderboard(self.ax_leaderboard, self.drivers, self.gap_timeline)
+        
+        self.add_component('track_map', self.track_map, priority=True)
+        self.add_component('lap_counter', self.lap_counter)
+        self.add_component('leaderboard', self.leaderboard)
         
         # Controls
         self.setup_controls()
@@ -72,39 +121,69 @@ class RaceReplay:
         
         # Leaderboard (top right)
         self.ax_leaderboard = self.fig.add_subplot(gs[0:2, 2])
-        self.leaderboard = Leaderboard(self.ax_leaderboard, self.drivers)
+        self.leaderboard = Leaderboard(self.ax_leaderboard, self.drivers, self.gap_timeline)
+        
+        self.add_component('track_map', self.track_map, priority=True)
+        self.add_component('lap_counter', self.lap_counter)
+        self.add_component('leaderboard', self.leaderboard)
+        
+        # Telemetry panels left out of TELEMETRY_PANELS are not built, nor
+        # their modules imported; their grid cells stay empty
+        if {'speed_trace', 'speedometers'} & set(TELEMETRY_PANELS):
+            from speed_trace import SpeedTrace, CurrentSpeedometer
+        if {'throttle_brake', 'gear_trace', 'rpm_trace', 'drs_indicator'} & set(TELEMETRY_PANELS):
+            from telemetry import ThrottleBrakeTrace, GearTrace, RPMTrace, DRSIndicator
         
         # Speed trace (middle left)
-        self.ax_speed = self.fig.add_subplot(gs[2, 0:2])
-        self.speed_trace = SpeedTrace(self.ax_speed, self.drivers, window_seconds=15)
+        if 'speed_trace' in TELEMETRY_PANELS:
+            self.ax_speed = self.fig.add_subplot(gs[2, 0:2])
+            self.speed_trace = SpeedTrace(self.ax_speed, self.drivers, window_seconds=15)
+            self.add_component('speed_trace', self.speed_trace)
         
         # Throttle/Brake (middle right)
-        self.ax_throttle = self.fig.add_subplot(gs[2, 2:4])
-        self.throttle_brake = ThrottleBrakeTrace(self.ax_throttle, self.drivers, window_seconds=15)
+        if 'throttle_brake' in TELEMETRY_PANELS:
+            self.ax_throttle = self.fig.add_subplot(gs[2, 2:4])
+            self.throttle_brake = ThrottleBrakeTrace(self.ax_throttle, self.drivers, window_seconds=15)
+            self.add_component('throttle_brake', self.throttle_brake)
         
         # Gear trace (bottom left)
-        self.ax_gear = self.fig.add_subplot(gs[3, 0:2])
-        self.gear_trace = GearTrace(self.ax_gear, self.drivers, window_seconds=15)
+        if 'gear_trace' in TELEMETRY_PANELS:
+            self.ax_gear = self.fig.add_subplot(gs[3, 0:2])
+            self.gear_trace = GearTrace(self.ax_gear, self.drivers, window_seconds=15)
+            self.add_component('gear_trace', self.gear_trace)
         
         # RPM trace (bottom right)
-        self.ax_rpm = self.fig.add_subplot(gs[3, 2:4])
-        self.rpm_trace = RPMTrace(self.ax_rpm, self.drivers, window_seconds=15)
+        if 'rpm_trace' in TELEMETRY_PANELS:
+            self.ax_rpm = self.fig.add_subplot(gs[3, 2:4])
+            self.rpm_trace = RPMTrace(self.ax_rpm, self.drivers, window_seconds=15)
+            self.add_component('rpm_trace', self.rpm_trace)
         
         # Speedometers for first 3 drivers (top right, stacked)
         self.speedometers = []
-        for i, driver in enumerate(self.drivers[:3]):
-            ax_speed = self.fig.add_subplot(gs[i, 3])
-            speedometer = CurrentSpeedometer(ax_speed, driver)
-            self.speedometers.append(speedometer)
+        if 'speedometers' in TELEMETRY_PANELS:
+            for i, driver in enumerate(self.drivers[:3]):
+                ax_speed = self.fig.add_subplot(gs[i, 3])
+                speedometer = CurrentSpeedometer(ax_speed, driver)
+                self.speedometers.append(speedometer)
+                self.add_component('speedometer', speedometer, index=i)
         
         # DRS indicator for first driver
-        if len(self.drivers) > 0:
+        if 'drs_indicator' in TELEMETRY_PANELS and len(self.drivers) > 0:
             self.ax_drs = self.fig.add_subplot(gs[3, 3])
             self.drs_indicator = DRSIndicator(self.ax_drs, self.drivers[0])
+            self.add_component('drs_indicator', self.drs_indicator)
         
         # Controls
         self.setup_controls()
     
+    def add_component(self, name, component, priority=False, index=None):
+        #Register a widget at its configured refresh rate and cost
+        # The index tells apart widgets sharing a name (one speedometer per driver)
+        rate, cost = WIDGET_UPDATE_RATES[name]
+        label = name if index is None else f"{name}[{index}]"
+        self.components.append(component)
+        self.scheduler.register(component, rate, cost, priority, label)
+    
     def setup_controls(self):
         #Setup UI controls (buttons and sliders)
         # Play/Pause button
@@ -114,43 +193,81 @@ class RaceReplay:
         
         # Time slider
         time_slider_ax = self.fig.add_axes([0.25, 0.07, 0.5, 0.02])
-        self.time_slider = Slider(time_slider_ax, "Time", 0.0, self.max_time, 
-                                  valinit=0.0, color='blue')
+        self.time_slider = QuietSlider(time_slider_ax, "Time", 0.0, self.max_time, 
+                                       valinit=0.0, color='blue')
+        self.time_slider.valtext.set_visible(False)  # The clock below shows the time
         self.time_slider.on_changed(self.on_scrub)
         
         # Speed slider
         speed_slider_ax = self.fig.add_axes([0.25, 0.03, 0.5, 0.02])
-        self.speed_slider = Slider(speed_slider_ax, "Speed", 0.25, 3.0, 
-                                   valinit=1.0, color='green')
-        self.speed_slider.on_changed(lambda val: setattr(self, 'speed', val))
+        self.speed_slider = QuietSlider(speed_slider_ax, "Speed", 0.25, 3.0, 
+                                        valinit=1.0, color='green')
+        self.speed_slider.on_changed(self.on_speed)
         
-        # Time display
-        self.time_text = self.fig.text(0.8, 0.06, "00:00.0", 
+        # Time display, in its own axes so it can be blitted
+        clock_ax = self.fig.add_axes([0.75, 0.03, 0.1, 0.07])
+        clock_ax.axis('off')
+        self.time_text = clock_ax.text(0.5, 0.5, "00:00.0", 
                                        fontsize=14, fontweight='bold',
-                                       ha='center',
+                                       ha='center', va='center',
                                        bbox=dict(boxstyle='round', 
                                                facecolor='black', 
                                                edgecolor='white',
                                                linewidth=2, alpha=0.8),
                                        color='white')
     
+    def setup_profiler(self):
+        #Record per-stage frame times and optionally show the slowest on the figure
+        self.profiler = FrameProfiler(FRAME_PROFILE_WINDOW)
+        self.profile_shown = 0.0
+        if FRAME_PROFILE_OVERLAY:
+            # Own axes in free space by the controls, so it gets a blit region of its own
+            rect = [0.86, 0.01, 0.14, 0.09] if self.enable_telemetry else [0.76, 0.11, 0.23, 0.12]
+            profile_ax = self.fig.add_axes(rect)
+            profile_ax.axis('off')
+            self.profile_text = profile_ax.text(0.0, 1.0, "", va='top', fontsize=6,
+                                                family='monospace')
+    
     def toggle_play(self, event):
         #Toggle play/pause
         if self.is_paused:
-            self.ani.event_source.start()
+            self.clock.resume()
+            self.timer.start()
             self.play_button.label.set_text("Pause")
             self.play_button.color = 'lightgray'
         else:
-            self.ani.event_source.stop()
+            self.timer.stop()
+            self.clock.pause()
             self.play_button.label.set_text("Play")
             self.play_button.color = 'lightgreen'
         self.is_paused = not self.is_paused
+        self.fig.canvas.draw_idle()
     
     def on_scrub(self, val):
-        #Handle manual time scrubbing
-        self.manual_scrub = True
-        self.update(int(val * FPS))
-        self.fig.canvas.draw_idle()
+        #Handle manual time scrubbing; playback carries on from here
+        self.clock.seek(val)
+        if self.seek_pending:
+            return  # A draw is already due and will pick up the latest time
+        self.seek_pending = True
+        
+        if self.seek_timer is None:
+            self.show_seek()  # Not started, nothing else would draw it
+        elif self.is_paused:
+            self.seek_timer.start()
+        # While playing, the next step shows it
+    
+    def show_seek(self):
+        #Draw the time the last slider event asked for, refreshing every widget
+        if not self.seek_pending:
+            return  # Playback got there first
+        self.seek_pending = False
+        self.update(self.clock.time())
+        self.render()
+    
+    def on_speed(self, val):
+        #Change playback speed without jumping in replay time
+        self.speed = val
+        self.clock.set_speed(val)
     
     def detect_dnf(self, current_time):
         #Detect and mark DNF drivers
@@ -160,69 +277,169 @@ class RaceReplay:
                 
             if driver.has_finished(current_time):
                 # Check if finished significantly early
-                if driver.telemetry["t"].iloc[-1] < self.max_time * DNF_THRESHOLD:
-                    lap = driver.get_current_lap(driver.telemetry["t"].iloc[-1])
-                    driver.set_dnf(driver.telemetry["t"].iloc[-1], lap)
+                if driver.end_time < self.max_time * DNF_THRESHOLD:
+                    lap = driver.get_current_lap(driver.end_time)
+                    driver.set_dnf(driver.end_time, lap)
                     logger.info(f"{driver.code} DNF detected at lap {lap}")
     
+    def refresh_stream(self):
+        #Pick up newly streamed laps and extend the timeline and slider
+        if self.stream.poll():
+            self.max_time = max(d.end_time for d in self.drivers)
+            self.timeline.extend(self.max_time)
+            self.time_slider.valmax = self.max_time
+            self.time_slider.ax.set_xlim(0, self.max_time)
+            self.fig.canvas.draw_idle()  # Slider axis is part of the background
+        
+        if self.stream.done:
+            logger.info(f"All telemetry loaded: {self.max_time:.1f}s duration")
+            self.stream = None
+            self.gap_timeline = GapTimeline(self.drivers, max_time=self.max_time)
+            self.leaderboard.gap_timeline = self.gap_timeline
+    
     def format_time(self, seconds):
         #Format seconds to MM:SS.s
         minutes = int(seconds // 60)
         secs = seconds % 60
         return f"{minutes:02d}:{secs:04.1f}"
     
-    def update(self, frame):
-        #Update animation frame
-        # Calculate current time
-        if self.manual_scrub:
-            current_time = self.time_slider.val
-            self.manual_scrub = False
-        else:
-            current_time = frame / FPS * self.speed
-            self.time_slider.set_val(current_time)
+    def update(self, current_time, scheduled=False):
+        #Update the widgets for a replay time in seconds; scheduled updates only refresh the due ones
+        self.current_time = current_time
+        
+        # Move the slider without re-entering on_scrub; the frame's draw shows it
+        slider = self.time_slider
+        drawon = slider.drawon
+        slider.eventson = slider.drawon = False
+        slider.set_val(current_time)
+        slider.eventson, slider.drawon = True, drawon
         
         # Update time display
         self.time_text.set_text(self.format_time(current_time))
         
-        # Detect DNFs
-        self.detect_dnf(current_time)
-        
-        # Update core components
-        self.track_map.update(current_time)
-        self.lap_counter.update(current_time)
-        self.leaderboard.update(current_time)
-        
-        # Update telemetry graphs if enabled
-        if self.enable_telemetry:
-            self.speed_trace.update(current_time)
-            self.throttle_brake.update(current_time)
-            self.gear_trace.update(current_time)
-            self.rpm_trace.update(current_time)
-            
-            # Update speedometers
-            for speedometer in self.speedometers:
-                speedometer.update(current_time)
-            
-            # Update DRS
-            if hasattr(self, 'drs_indicator'):
-                self.drs_indicator.update(current_time)
-        
-        return []
+        # Detect DNFs once every lap is known
+        if self.stream is None:
+            self.detect_dnf(current_time)
+        
+        # One lookup per driver for this frame, shared by every component
+        start = time.perf_counter()
+        snapshot = self.timeline.snapshot(current_time)
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.record('snapshot', time.perf_counter() - start)
+        
+        self.scheduler.run(snapshot, force=not scheduled)
+        if profiler is not None:
+            # The scheduler already times each update
+            for widget in self.scheduler.updated:
+                profiler.record(widget.label, widget.update_time)
+    
+    def step(self):
+        #Show the replay time the wall clock has reached, skipping frames we fell behind on
+        frame_start = time.perf_counter()
+        if self.stream is not None:
+            self.refresh_stream()
+        
+        # A seek refreshes every widget, not just the ones due
+        seeked = self.seek_pending
+        self.seek_pending = False
+        
+        current_time = self.clock.time()
+        if current_time >= self.max_time:
+            if self.stream is None:
+                current_time = 0.0  # Loop back to the start
+            else:
+                current_time = self.max_time  # Wait at the end of streamed data
+            self.clock.seek(current_time)
+        
+        self.update(current_time, scheduled=SCHEDULED_UPDATES and not seeked)
+        if self.profiler is not None:
+            self.update_profile(frame_start)
+        
+        draw_start = time.perf_counter()
+        self.render()
+        if self.profiler is not None:
+            now = time.perf_counter()
+            self.profiler.record('draw', now - draw_start)
+            self.profiler.record('frame', now - frame_start)
+            if self.blitter is not None:
+                self.profile_draws(self.blitter.draw_costs)
+        if self.blitter is not None:
+            self.scheduler.record_draws(self.blitter.draw_costs)
+        self.clock.tick()
+    
+    def profile_draws(self, draw_costs):
+        #Split the blitted draw by widget
+        for widget in self.scheduler.updated:
+            drawn = widget.draw_time(draw_costs)
+            if drawn is not None:
+                self.profiler.record(f"{widget.label} draw", drawn)
+    
+    def update_profile(self, now):
+        #Refresh the overlay about once a second
+        if self.profile_text is not None and now - self.profile_shown >= 1.0:
+            self.profile_text.set_text(self.profiler.overlay_text(limit=10))
+            self.profile_shown = now
+    
+    def render(self):
+        #Show the current frame, blitting only the changing artists when enabled
+        if self.blitter is not None:
+            self.blitter.update()
+        elif self.profiler is not None:
+            # Draw now rather than from the event loop, so the draw is timed with its frame
+            self.fig.canvas.draw()
+        else:
+            self.fig.canvas.draw_idle()
+    
+    def animated_artists(self):
+        """Every artist that changes from frame to frame"""
+        slider = self.time_slider
+        artists = [self.time_text, slider.poly, *slider.ax.lines]
+        if self.profile_text is not None:
+            artists.append(self.profile_text)
+        for component in self.components:
+            artists.extend(component.animated_artists())
+        return artists
+    
+    def enable_blitting(self):
+        #Redraw only the animated artists from now on
+        # Legends stay on top of the traces blitted over them
+        legends = [ax.get_legend() for ax in self.fig.axes if ax.get_legend() is not None]
+        self.blitter = BlitManager(self.fig.canvas, self.animated_artists(), legends)
+        self.time_slider.drawon = False  # The slider is redrawn with the other artists
+    
+    def on_close(self, event):
+        #Report how well playback kept up
+        stats = self.clock.summary()
+        logger.info(f"Playback finished: {stats['rendered']} frames shown, "
+                    f"{stats['dropped']} dropped, {stats['effective_fps']:.1f} fps effective "
+                    f"(target {stats['target_fps']})")
+        if self.profiler is not None:
+            self.profiler.report(FRAME_PROFILE_REPORT)
     
     def start(self):
         """Start the animation"""
         logger.info("Starting race replay animation")
-        self.ani = FuncAnimation(
-            self.fig, self.update, 
-            frames=self.frames, 
-            interval=1000/FPS, 
-            blit=False
-        )
+        if BLIT_RENDERING and self.fig.canvas.supports_blit:
+            self.enable_blitting()
+        
+        self.update(self.clock.time())
+        self.fig.canvas.mpl_connect('close_event', self.on_close)
+        
+        # A streamed race keeps growing, so playback runs until the window is closed
+        self.timer = self.fig.canvas.new_timer(interval=int(1000 / FPS))
+        self.timer.add_callback(self.step)
+        self.seek_timer = self.fig.canvas.new_timer(interval=int(1000 / FPS))
+        self.seek_timer.single_shot = True
+        self.seek_timer.add_callback(self.show_seek)
+        self.clock.resume()
+        self.timer.start()
         plt.show()
 
 
 class MinimalReplay(RaceReplay):
     #Minimal version for performance (no telemetry graphs)
     
-    def __init__(self, drivers, track_telemetry):
-        super().__init__(drivers, track_telemetry, enable_telemetry=False)
\ No newline at end of file
+    def __init__(self, drivers, track_telemetry, timeline=None, gap_timeline=None):
+        super().__init__(drivers, track_telemetry, enable_telemetry=False,
+                         timeline=timeline, gap_timeline=gap_timeline)
\ No newline at end of file
@@ -0,0 +1,169 @@
+# render.py
+# Headless replay rendering to a video file or an image sequence
+
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import matplotlib
+import matplotlib.pyplot as plt
+from matplotlib.image import imsave
+from race_replay import RaceReplay
+from config import FPS, RENDER_WORKERS, RENDER_DPI, RENDER_CHUNK_SECONDS
+import logging
+
+logger = logging.getLogger(__name__)
+
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.mov', '.avi')
+
+# Per-process renderer used by the pool workers
+_worker_renderer = None
+
+
+def _init_worker(drivers, track_telemetry, enable_telemetry, gap_timeline):
+    #Build the figure once in each worker process
+    global _worker_renderer
+    _worker_renderer = FrameRenderer(drivers, track_telemetry, enable_telemetry, gap_timeline)
+
+
+def _render_in_worker(frames, target):
+    return _worker_renderer.render(frames, target)
+
+
+def is_video(path):
+    return os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS
+
+
+def find_ffmpeg():
+    """Path of the ffmpeg binary matplotlib is configured with"""
+    ffmpeg = shutil.which(matplotlib.rcParams['animation.ffmpeg_path'])
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg is required for video output; "
+                           "render to a directory for an image sequence instead")
+    return ffmpeg
+
+
+class VideoWriter:
+    #Pipes raw RGBA frames into an ffmpeg H.264 encoder
+
+    def __init__(self, path, size, fps=FPS):
+        width, height = size
+        self.path = path
+        self.proc = subprocess.Popen([
+            find_ffmpeg(), '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgba', '-s', f'{width}x{height}',
+            '-r', str(fps), '-i', '-',
+            '-an', '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
+            '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',  # H.264 needs even sizes
+            path,
+        ], stdin=subprocess.PIPE)
+
+    def write(self, pixels):
+        self.proc.stdin.write(pixels)
+
+    def close(self):
+        self.proc.stdin.close()
+        if self.proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed writing {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def concat_videos(parts, output):
+    """Join video chunks end to end without re-encoding"""
+    list_path = f"{output}.parts.txt"
+    with open(list_path, "w") as f:
+        for part in parts:
+            f.write(f"file '{os.path.abspath(part)}'\n")
+    try:
+        subprocess.run([find_ffmpeg(), '-y', '-loglevel', 'error', '-f', 'concat',
+                        '-safe', '0', '-i', list_path, '-c', 'copy', output], check=True)
+    finally:
+        os.remove(list_path)
+
+
+class FrameRenderer:
+    #Draws replay frames off screen on the Agg backend
+
+    def __init__(self, drivers, track_telemetry, enable_telemetry=True,
+                 gap_timeline=None, dpi=RENDER_DPI):
+        plt.switch_backend("Agg")
+        self.replay = RaceReplay(drivers, track_telemetry, enable_telemetry,
+                                 gap_timeline=gap_timeline)
+        self.replay.fig.set_dpi(dpi)
+        self.replay.enable_blitting()
+
+        canvas = self.replay.fig.canvas
+        canvas.draw()
+        self.size = canvas.get_width_height()
+
+    def frame(self, index):
+        """RGBA pixels of one replay frame (a view of the canvas buffer)"""
+        self.replay.update(index / FPS)
+        self.replay.render()
+        return np.asarray(self.replay.fig.canvas.buffer_rgba())
+
+    def render(self, frames, target):
+        """Render frames into a video file or an image directory"""
+        if is_video(target):
+            with VideoWriter(target, self.size) as writer:
+                for index in frames:
+                    writer.write(self.frame(index))
+        else:
+            for index in frames:
+                imsave(os.path.join(target, f"frame_{index:06d}.png"), self.frame(index))
+        return len(frames)
+
+
+def render_replay(drivers, track_telemetry, output, start=0.0, end=None,
+                  enable_telemetry=True, gap_timeline=None,
+                  workers=RENDER_WORKERS, chunk_seconds=RENDER_CHUNK_SECONDS):
+    """Render [start, end] seconds of a replay to a video or a directory of PNGs
+
+    The frames are split into chunks of chunk_seconds, rendered independently
+    on a process pool and, for video, joined at the end.
+    """
+    if end is None:
+        end = max(d.end_time for d in drivers)
+    frames = range(int(start * FPS), int(end * FPS) + 1)
+    size = max(int(chunk_seconds * FPS), 1)
+    chunks = [frames[i:i + size] for i in range(0, len(frames), size)]
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+
+    video = is_video(output)
+    if video:
+        find_ffmpeg()  # Fail before any rendering
+        work_dir = tempfile.mkdtemp(prefix=".render-", dir=os.path.dirname(os.path.abspath(output)))
+        ext = os.path.splitext(output)[1]
+        targets = [os.path.join(work_dir, f"part{i:05d}{ext}") for i in range(len(chunks))]
+    else:
+        os.makedirs(output, exist_ok=True)
+        targets = [output] * len(chunks)
+
+    logger.info(f"Rendering {len(frames)} frames ({start:.1f}s-{end:.1f}s) to {output} "
+                f"in {len(chunks)} chunks on {workers} workers")
+    try:
+        if workers > 1:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker,
+                initargs=(drivers, track_telemetry, enable_telemetry, gap_timeline)
+            ) as executor:
+                rendered = sum(executor.map(_render_in_worker, chunks, targets))
+        else:
+            renderer = FrameRenderer(drivers, track_telemetry, enable_telemetry, gap_timeline)
+            rendered = sum(renderer.render(c, t) for c, t in zip(chunks, targets))
+
+        if video:
+            concat_videos(targets, output)
+    finally:
+        if video:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    logger.info(f"Rendered {rendered} frames to {output}")
+    return rendered
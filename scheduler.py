@@ -0,0 +1,99 @@
+# scheduler.py
+# Per-widget update rates within a per-frame time budget
+
+import math
+import time
+
+
+class ScheduledWidget:
+    #A replay component with its refresh rate and running cost estimate
+
+    __slots__ = ('component', 'label', 'rate', 'cost', 'priority', 'artists',
+                 'last_update', 'update_time')
+
+    def __init__(self, component, rate, cost, priority, label=None):
+        self.component = component
+        self.label = label or type(component).__name__  # Names its profiler timings
+        self.rate = rate
+        self.cost = cost / 1000.0  # Seconds for an update plus its redraw
+        self.priority = priority
+        self.artists = component.animated_artists()
+        self.last_update = -math.inf
+        self.update_time = 0.0
+
+    def draw_time(self, draw_costs):
+        """Seconds spent redrawing this widget's artists, None if they weren't drawn"""
+        drawn = [draw_costs[a] for a in self.artists if a in draw_costs]
+        return sum(drawn) if drawn else None
+
+    def lateness(self, now):
+        """Refresh intervals elapsed since the last update (due at 1)"""
+        return (now - self.last_update) * self.rate
+
+
+class UpdateScheduler:
+    #Chooses which widgets to refresh each frame
+    #
+    # A widget is due once its refresh interval has passed, give or take half
+    # a frame: ticks come every 1/fps seconds, so waiting for the full
+    # interval would skip every other due tick. Priority widgets (the track
+    # map) run on every frame; the rest run most-overdue first
+    # while their estimated cost fits in what is left of the frame budget.
+    # Costs start from the registered estimate and follow the measured
+    # update and redraw times. A widget whose cost never fits still runs
+    # once it is max_lateness intervals late, so nothing freezes.
+
+    def __init__(self, fps, budget=0.8, max_lateness=3.0, smoothing=0.2,
+                 clock=time.perf_counter):
+        self.budget = budget / fps
+        self.slack = 0.5 / fps  # Seconds early a widget may run
+        self.max_lateness = max_lateness
+        self.smoothing = smoothing
+        self.clock = clock
+        self.widgets = []
+        self.updated = []
+
+    def register(self, component, rate, cost, priority=False, label=None):
+        """Add a component refreshed rate times per second, costing about cost ms"""
+        self.widgets.append(ScheduledWidget(component, rate, cost, priority, label))
+
+    def due(self, now):
+        """Widgets to refresh this frame, in update order"""
+        due = [w for w in self.widgets
+               if w.priority or w.lateness(now) >= 1.0 - w.rate * self.slack]
+        due.sort(key=lambda w: (not w.priority, -w.lateness(now)))
+
+        chosen = []
+        remaining = self.budget
+        optional = 0
+        for widget in due:
+            if not widget.priority:
+                fits = widget.cost <= remaining
+                starved = optional == 0 and widget.lateness(now) >= self.max_lateness
+                if not (fits or starved):
+                    continue
+                optional += 1
+            chosen.append(widget)
+            remaining -= widget.cost
+        return chosen
+
+    def run(self, snapshot, force=False):
+        """Update the due widgets (every widget when forced) from a snapshot"""
+        now = self.clock()
+        self.updated = self.widgets if force else self.due(now)
+        for widget in self.updated:
+            start = self.clock()
+            widget.component.update(snapshot)
+            widget.update_time = self.clock() - start
+            widget.last_update = now
+        return self.updated
+
+    def record_draws(self, draw_costs):
+        """Fold the redraw times of this frame's artists into the cost estimates"""
+        for widget in self.updated:
+            drawn = widget.draw_time(draw_costs)
+            if drawn is None:
+                continue  # Not blitted; keep the registered estimate
+            sample = widget.update_time + drawn
+            widget.cost += self.smoothing * (sample - widget.cost)
+        self.updated = []
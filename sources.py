@@ -0,0 +1,409 @@
+# sources.py
+# Where session data comes from: FastF1, or a local recording exported from it
+
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+from config import CACHE_DIR, STAGED_SESSION_LOADING, STREAM_CHUNK_LAPS
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Raw channels kept in a recording and their stored dtypes
+RECORDED_DTYPES = {
+    't': np.float64,
+    'X': np.float32,
+    'Y': np.float32,
+    'Speed': np.float32,
+    'Throttle': np.float32,
+    'Brake': np.bool_,
+    'nGear': np.int8,
+    'RPM': np.float32,
+    'DRS': np.int8,
+}
+
+# Always read, whatever columns are asked for: processing needs time and position
+REQUIRED_COLUMNS = ('t', 'X', 'Y')
+
+RECORDING_FORMAT = 1
+
+
+class TelemetrySource:
+    #Interface SessionLoader reads a session through
+    #
+    # Telemetry is returned raw, as (telemetry frames, lap starts, team): the
+    # frames carry a 't' column in seconds from the driver's race start and
+    # go through Driver.process_telemetry like any other. lap_starts may be
+    # None, in which case laps are detected from gaps in the data.
+
+    def __init__(self):
+        self.columns = None  # Channels read by default; None reads all of them
+
+    def load(self):
+        """Load session-level data; returns False when the session is unavailable"""
+        raise NotImplementedError
+
+    def driver_teams(self):
+        """{driver code: team} for every driver in the session"""
+        raise NotImplementedError
+
+    def lap_starts(self, driver_code):
+        """Start of each of the driver's laps, in seconds from their race start"""
+        raise NotImplementedError
+
+    def driver_telemetry(self, driver_code, replay_mode, columns=None):
+        """Raw telemetry for one driver, or None if there is none"""
+        raise NotImplementedError
+
+    def race_chunks(self, driver_codes, chunk_laps=STREAM_CHUNK_LAPS):
+        """Yield (last lap, {code: (telemetry, lap_starts, team)}) a few laps at a time"""
+        raise NotImplementedError
+
+    def reference_track(self):
+        """X/Y of a reference lap, or None"""
+        raise NotImplementedError
+
+    def request(self, driver_codes):
+        """Hint that telemetry for these drivers is about to be loaded"""
+
+
+class FastF1Source(TelemetrySource):
+    #Session data downloaded (and cached) by FastF1
+
+    def __init__(self, year, round_number, session_type):
+        super().__init__()
+        self.year = year
+        self.round_number = round_number
+        self.session_type = session_type
+        self.session = None
+        self.laps = None
+        self._telemetry_loaded = False
+        self._session_lock = threading.Lock()
+
+        # Imported here so recorded sessions never pay for it
+        import fastf1
+        self.fastf1 = fastf1
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fastf1.Cache.enable_cache(CACHE_DIR)
+
+    def load(self):
+        #Load the FastF1 session (laps and results only when staged)
+        try:
+            logger.info(f"Loading {self.year} Round {self.round_number} {self.session_type}")
+            self.session = self.fastf1.get_session(self.year, self.round_number, self.session_type)
+            if STAGED_SESSION_LOADING:
+                self.session.load(laps=True, telemetry=False, weather=False, messages=False)
+            else:
+                self.session.load()
+            self.laps = self.session.laps
+            logger.info("Session loaded successfully")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to load session: {e}")
+            return False
+
+    def _ensure_session(self, telemetry=False):
+        #Load the FastF1 session on first use, and its telemetry once it is needed
+        with self._session_lock:
+            if self.laps is None and not self.load():
+                raise RuntimeError("FastF1 session could not be loaded")
+            if telemetry and STAGED_SESSION_LOADING and not self._telemetry_loaded:
+                # FastF1 downloads and parses car and position data for the
+                # whole field in one go; there is no per-driver stream
+                logger.info("Loading car and position data")
+                self.session.load(laps=False, telemetry=True, weather=False, messages=False)
+                self._telemetry_loaded = True
+
+    def driver_teams(self):
+        self._ensure_session()
+        teams = self.laps.drop_duplicates("Driver").set_index("Driver")["Team"]
+        return teams.to_dict()
+
+    def lap_starts(self, driver_code):
+        self._ensure_session()
+        starts = self.laps.pick_driver(driver_code)["LapStartTime"].dropna()
+        return sorted((starts - starts.min()).dt.total_seconds().tolist())
+
+    def driver_telemetry(self, driver_code, replay_mode, columns=None):
+        self._ensure_session(telemetry=True)
+        drv_laps = self.laps.pick_driver(driver_code)
+        tel_list = []
+        lap_starts = None
+
+        if replay_mode == "FASTEST":
+            lap = drv_laps.pick_fastest()
+            if lap is None:
+                logger.warning(f"No valid lap for {driver_code}")
+                return None
+
+            t = self._merged_telemetry(lap).dropna(subset=["X", "Y", "Time"])
+            t["t"] = t["Time"].dt.total_seconds()
+            tel_list.append(t)
+
+        else:  # RACE mode
+            try:
+                tel_list, lap_starts = self._race_telemetry_bulk(drv_laps)
+            except Exception as e:
+                logger.debug(f"Bulk telemetry failed for {driver_code}, loading per lap: {e}")
+                tel_list = self._race_telemetry_per_lap(driver_code, drv_laps)
+
+        if not tel_list:
+            return None
+        return tel_list, lap_starts, drv_laps["Team"].iloc[0]
+
+    @staticmethod
+    def _merged_telemetry(laps):
+        #Merge position and car data for a lap or laps, without the
+        #driver-ahead channels of get_telemetry that need every driver's data
+        pos = laps.get_pos_data(pad=1, pad_side='both')
+        car = laps.get_car_data(pad=1, pad_side='both')
+        return pos.merge_channels(car).slice_by_lap(laps, interpolate_edges=True)
+
+    def _race_telemetry_bulk(self, drv_laps):
+        #Whole-race telemetry from a single pos/car merge
+        tel = self._merged_telemetry(drv_laps).dropna(subset=["X", "Y", "Time"])
+        if tel.empty:
+            return [], None
+
+        # Time is relative to the first lap start, as are the lap boundaries
+        tel["t"] = tel["Time"].dt.total_seconds()
+        lap_start_times = drv_laps["LapStartTime"].dropna()
+        lap_starts = (lap_start_times - lap_start_times.min()).dt.total_seconds()
+
+        return [tel], sorted(lap_starts.tolist())
+
+    def _race_telemetry_per_lap(self, driver_code, drv_laps):
+        #Lap-by-lap telemetry, used when the bulk merge fails
+        tel_list = []
+        offset = 0.0
+
+        for _, lap in drv_laps.iterlaps():
+            try:
+                t = self._merged_telemetry(lap).dropna(subset=["X", "Y", "Time"])
+            except Exception as e:
+                logger.debug(f"Skipping lap for {driver_code}: {e}")
+                continue
+
+            if t.empty:
+                continue
+
+            t["t"] = t["Time"].dt.total_seconds() + offset
+            offset = t["t"].iloc[-1]
+            tel_list.append(t)
+
+        return tel_list
+
+    def race_chunks(self, driver_codes, chunk_laps=STREAM_CHUNK_LAPS):
+        self._ensure_session(telemetry=True)
+
+        driver_laps = {code: self.laps.pick_driver(code) for code in driver_codes}
+        total_laps = int(max(laps["LapNumber"].max() for laps in driver_laps.values()))
+
+        # Every chunk is timed from the driver's own race start
+        race_starts = {code: laps["LapStartTime"].min() for code, laps in driver_laps.items()}
+
+        for first_lap in range(1, total_laps + 1, chunk_laps):
+            last_lap = min(first_lap + chunk_laps - 1, total_laps)
+            chunk = {}
+
+            for code, drv_laps in driver_laps.items():
+                part = drv_laps[drv_laps["LapNumber"].between(first_lap, last_lap)]
+                if part.empty:
+                    continue
+                try:
+                    tel = self._merged_telemetry(part).dropna(subset=["X", "Y", "Time"])
+                except Exception as e:
+                    logger.debug(f"Skipping laps {first_lap}-{last_lap} for {code}: {e}")
+                    continue
+                if tel.empty:
+                    continue
+
+                tel["t"] = (tel["SessionTime"] - race_starts[code]).dt.total_seconds()
+                lap_starts = (part["LapStartTime"].dropna() - race_starts[code]).dt.total_seconds()
+                chunk[code] = (tel, sorted(lap_starts.tolist()), drv_laps["Team"].iloc[0])
+
+            logger.debug(f"Streamed laps {first_lap}-{last_lap} for {len(chunk)} drivers")
+            yield last_lap, chunk
+
+    def reference_track(self):
+        #Track coordinates from the fastest lap of the first driver
+        self._ensure_session(telemetry=True)
+        ref_driver = min(self.laps['Driver'].unique())
+        ref_lap = self.laps.pick_driver(ref_driver).pick_fastest()
+        return self._merged_telemetry(ref_lap).dropna(subset=["X", "Y"])
+
+
+class RecordedSource(TelemetrySource):
+    #A session exported with record_session; needs numpy only
+    #
+    # Layout: <path>/recording.json       session, drivers and teams, modes
+    #         <path>/track.npz            reference track X/Y
+    #         <path>/<mode>/<driver>.npz  one array per channel, plus lap_starts
+    #
+    # Each channel is a separate member of the .npz archive and is only
+    # read (and decompressed) when asked for.
+
+    def __init__(self, path, columns=None):
+        super().__init__()
+        self.path = path
+        self.columns = columns  # Default for driver_telemetry; None reads everything
+        self.meta = None
+
+    def load(self):
+        try:
+            with open(os.path.join(self.path, "recording.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to open recording {self.path}: {e}")
+            return False
+        if meta.get("format") != RECORDING_FORMAT:
+            logger.error(f"Unsupported recording format {meta.get('format')} in {self.path}")
+            return False
+        self.meta = meta
+        logger.info(f"Opened recording of {meta['year']} Round {meta['round']} "
+                    f"{meta['session']} ({', '.join(meta['modes'])})")
+        return True
+
+    def _meta(self):
+        if self.meta is None and not self.load():
+            raise RuntimeError(f"Recording {self.path} could not be opened")
+        return self.meta
+
+    @property
+    def year(self):
+        return self._meta()["year"]
+
+    @property
+    def round_number(self):
+        return self._meta()["round"]
+
+    @property
+    def session_type(self):
+        return self._meta()["session"]
+
+    @property
+    def modes(self):
+        return self._meta()["modes"]
+
+    def driver_teams(self):
+        return dict(self._meta()["drivers"])
+
+    def _read(self, path, columns):
+        #Only the requested members of the archive are decompressed
+        with np.load(path) as archive:
+            names = archive.files if columns is None else \
+                [name for name in archive.files
+                 if name in columns or name in REQUIRED_COLUMNS or name == "lap_starts"]
+            return {name: archive[name] for name in names}
+
+    def _driver_file(self, driver_code, replay_mode):
+        return os.path.join(self.path, replay_mode, f"{driver_code}.npz")
+
+    def lap_starts(self, driver_code):
+        with np.load(self._driver_file(driver_code, "RACE")) as archive:
+            return archive["lap_starts"].tolist()
+
+    def driver_telemetry(self, driver_code, replay_mode, columns=None):
+        team = self.driver_teams().get(driver_code)
+        path = self._driver_file(driver_code, replay_mode)
+        if team is None or not os.path.exists(path):
+            logger.warning(f"No {replay_mode} telemetry for {driver_code} in {self.path}")
+            return None
+
+        arrays = self._read(path, columns or self.columns)
+        lap_starts = arrays.pop("lap_starts", None)
+        tel = pd.DataFrame(arrays)
+        return [tel], None if lap_starts is None else lap_starts.tolist(), team
+
+    def race_chunks(self, driver_codes, chunk_laps=STREAM_CHUNK_LAPS):
+        #Replays the recorded race in lap ranges, like the FastF1 stream
+        races = {}
+        for code in driver_codes:
+            data = self.driver_telemetry(code, "RACE")
+            if data is not None and data[1] is not None:
+                races[code] = data
+        if not races:
+            return
+        total_laps = max(len(lap_starts) for _, lap_starts, _ in races.values())
+
+        for first_lap in range(1, total_laps + 1, chunk_laps):
+            last_lap = min(first_lap + chunk_laps - 1, total_laps)
+            chunk = {}
+            for code, ([tel], lap_starts, team) in races.items():
+                if first_lap > len(lap_starts):
+                    continue
+                start = lap_starts[first_lap - 1]
+                end = lap_starts[last_lap] if last_lap < len(lap_starts) else np.inf
+                t = tel["t"].to_numpy()
+                # One sample of padding each side, as FastF1 gives
+                lo = max(int(t.searchsorted(start)) - 1, 0)
+                hi = int(t.searchsorted(end, side='right')) + 1
+                chunk[code] = (tel.iloc[lo:hi].reset_index(drop=True),
+                               lap_starts[first_lap - 1:last_lap], team)
+            yield last_lap, chunk
+
+    def reference_track(self):
+        try:
+            with np.load(os.path.join(self.path, "track.npz")) as archive:
+                return pd.DataFrame({"X": archive["X"], "Y": archive["Y"]})
+        except (OSError, KeyError) as e:
+            logger.error(f"No reference track in {self.path}: {e}")
+            return None
+
+
+def record_session(source, path, driver_codes, modes=("RACE",)):
+    """Export drivers' raw telemetry from a source into a recording at path
+
+    Returns the driver codes written. Existing recordings at path are
+    extended: drivers and modes are merged into its metadata.
+    """
+    os.makedirs(path, exist_ok=True)
+    meta_path = os.path.join(path, "recording.json")
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        meta = {"format": RECORDING_FORMAT, "year": source.year, "round": source.round_number,
+                "session": source.session_type, "drivers": {}, "modes": []}
+
+    source.request(driver_codes)
+    written = []
+    for mode in modes:
+        os.makedirs(os.path.join(path, mode), exist_ok=True)
+        for code in driver_codes:
+            data = source.driver_telemetry(code, mode)
+            if data is None:
+                logger.warning(f"No {mode} telemetry for {code}, not recorded")
+                continue
+            tel_list, lap_starts, team = data
+            tel = pd.concat(tel_list, ignore_index=True) if len(tel_list) > 1 else tel_list[0]
+
+            arrays = {}
+            for name, dtype in RECORDED_DTYPES.items():
+                if name in tel.columns:
+                    series = tel[name]
+                    if not np.issubdtype(np.dtype(dtype), np.floating):
+                        series = series.fillna(0)
+                    arrays[name] = series.to_numpy(dtype=dtype)
+            if lap_starts is not None:
+                arrays["lap_starts"] = np.asarray(lap_starts, dtype=np.float64)
+            np.savez_compressed(os.path.join(path, mode, f"{code}.npz"), **arrays)
+
+            meta["drivers"][code] = team
+            if code not in written:
+                written.append(code)
+        if mode not in meta["modes"]:
+            meta["modes"].append(mode)
+
+    track = source.reference_track()
+    if track is not None:
+        np.savez_compressed(os.path.join(path, "track.npz"),
+                            X=track["X"].to_numpy(dtype=np.float64),
+                            Y=track["Y"].to_numpy(dtype=np.float64))
+
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    logger.info(f"Recorded {len(written)} drivers ({', '.join(modes)}) to {path}")
+    return written
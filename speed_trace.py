@@ -1,5 +1,7 @@
 
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.transforms import Affine2D
 from config import TEAM_COLORS
 import numpy as np
 
@@ -11,75 +13,68 @@ class SpeedTrace:
         self.drivers = drivers
         self.window_seconds = window_seconds  # Time window to display
         self.lines = {}
-        self.speed_data = {d.code: {'times': [], 'speeds': []} for d in drivers}
         
         self.setup_axes()
         
     def setup_axes(self):
         """Setup speed trace axes"""
         self.ax.set_title("Speed Trace (km/h)", fontsize=12, fontweight='bold')
-        self.ax.set_xlabel("Time (s)", fontsize=10)
+        self.ax.set_xlabel("Time relative to now (s)", fontsize=10)
         self.ax.set_ylabel("Speed (km/h)", fontsize=10)
         self.ax.grid(True, alpha=0.3, linestyle='--')
         self.ax.set_ylim(0, 350)  # F1 cars max ~350 km/h
         
+        # Lines keep race time; the shift puts "now" at 0 so the axis never moves
+        self.ax.set_xlim(-self.window_seconds, 1)
+        self.shift = Affine2D()
+        
         # Create line for each driver
         for driver in self.drivers:
             color = TEAM_COLORS.get(driver.team, "#888888")
             line, = self.ax.plot([], [], color=color, linewidth=2, 
-                                label=driver.code, alpha=0.8)
+                                label=driver.code, alpha=0.8,
+                                transform=self.shift + self.ax.transData)
             self.lines[driver.code] = line
         
         self.ax.legend(loc='upper left', fontsize=8, ncol=2)
     
-    def update(self, current_time):
+    def update(self, snapshot):
         """Update speed traces"""
-        # Clear and reset
+        current_time = snapshot.time
         min_time = max(0, current_time - self.window_seconds)
         
         for driver in self.drivers:
-            pos = driver.get_position_at_time(current_time)
-            tel = driver.telemetry
-            
-            # Get speed at current position
-            if 'Speed' in tel.columns:
-                speed = tel.loc[pos['idx'], 'Speed']
-            else:
-                # Calculate speed from distance if Speed column doesn't exist
-                speed = 0
-            
-            # Update data storage
-            times = self.speed_data[driver.code]['times']
-            speeds = self.speed_data[driver.code]['speeds']
-            
-            times.append(current_time)
-            speeds.append(speed)
-            
-            # Keep only data within window
-            while times and times[0] < min_time:
-                times.pop(0)
-                speeds.pop(0)
+            # Telemetry samples inside the window, as views into the driver's arrays
+            window = driver.window(min_time, current_time)
             
             # Update line
             alpha = 0.3 if driver.is_dnf() else 0.8
-            self.lines[driver.code].set_data(times, speeds)
+            self.lines[driver.code].set_data(driver.t[window],
+                                             driver.window_values('Speed', window))
             self.lines[driver.code].set_alpha(alpha)
         
-        # Adjust x-axis to show rolling window
-        self.ax.set_xlim(min_time, current_time + 1)
+        # Slide the window instead of the axis
+        self.shift.clear().translate(-current_time, 0)
+    
+    def animated_artists(self):
+        """Artists changed by update, for blitting"""
+        return list(self.lines.values())
 
 
 class SpeedHeatmap:
     """Speed heatmap showing speed distribution across track"""
     
-    def __init__(self, ax, driver, track_telemetry):
+    def __init__(self, ax, driver, track_telemetry, block_size=500):
         self.ax = ax
         self.driver = driver
         self.track_telemetry = track_telemetry
-        self.scatter = None
+        self.block_size = block_size  # Segments per prebuilt collection
+        self.blocks = []
         self.current_marker = None
+        self.revealed = 0  # Samples currently shown
         
         self.setup_axes()
+        self.build_segments()
         
     def setup_axes(self):
         """Setup speed heatmap"""
@@ -87,43 +82,6 @@ class SpeedHeatmap:
                          fontsize=12, fontweight='bold')
         self.ax.set_aspect('equal')
         self.ax.axis('off')
-    
-    def update(self, current_time):
-        """Update speed heatmap"""
-        pos = self.driver.get_position_at_time(current_time)
-        tel = self.driver.telemetry
-        
-        # Clear previous
-        if self.scatter:
-            self.scatter.remove()
-        if self.current_marker:
-            self.current_marker.remove()
-        
-        # Get speed data up to current position
-        idx = pos['idx']
-        x = tel['X'][:idx]
-        y = tel['Y'][:idx]
-        
-        if 'Speed' in tel.columns:
-            speeds = tel['Speed'][:idx]
-        else:
-            # Use dummy speed data
-            speeds = np.ones(len(x)) * 200
-        
-        # Draw speed heatmap
-        if len(x) > 0:
-            self.scatter = self.ax.scatter(
-                x, y, c=speeds, cmap='RdYlGn', 
-                s=10, alpha=0.6, vmin=0, vmax=350
-            )
-            
-            # Mark current position
-            color = TEAM_COLORS.get(self.driver.team, "#888888")
-            self.current_marker = self.ax.scatter(
-                [pos['x']], [pos['y']], 
-                color=color, s=100, marker='o',
-                edgecolors='white', linewidths=2, zorder=10
-            )
         
         # Set limits
         if hasattr(self.track_telemetry, 'X'):
@@ -131,6 +89,77 @@ class SpeedHeatmap:
                            self.track_telemetry["X"].max() + 20)
             self.ax.set_ylim(self.track_telemetry["Y"].min() - 20,
                            self.track_telemetry["Y"].max() + 20)
+        
+        # Current position marker, moved every frame
+        color = TEAM_COLORS.get(self.driver.team, "#888888")
+        self.current_marker, = self.ax.plot(
+            [], [], "o", color=color, markersize=10,
+            markeredgecolor='white', markeredgewidth=2, zorder=10
+        )
+    
+    def build_segments(self):
+        """Color the whole lap/race once, split into fixed-size blocks"""
+        x = self.driver.channel('X')
+        y = self.driver.channel('Y')
+        
+        if self.driver.has_channel('Speed'):
+            speeds = self.driver.channel('Speed')
+        else:
+            # Use dummy speed data
+            speeds = np.full(len(x), 200.0)
+        
+        # Segment i joins samples i and i+1 and takes the speed at i
+        points = np.column_stack((x, y))
+        self.segments = np.stack((points[:-1], points[1:]), axis=1)
+        self.colors = plt.get_cmap('RdYlGn')(np.clip(speeds[:-1] / 350, 0, 1))
+        
+        for start in range(0, len(self.segments), self.block_size):
+            end = start + self.block_size
+            block = LineCollection(self.segments[start:end], colors=self.colors[start:end],
+                                   linewidths=3, alpha=0.6, visible=False)
+            self.ax.add_collection(block, autolim=False)
+            self.blocks.append(block)
+    
+    def reveal(self, idx):
+        """Show the segments up to sample idx, touching only blocks that change"""
+        if idx == self.revealed:
+            return
+        n = len(self.blocks)
+        old_block = min(max(self.revealed - 1, 0) // self.block_size, n - 1)
+        new_block = min(max(idx - 1, 0) // self.block_size, n - 1)
+        
+        # Only the old current block was cut short; the others keep their full
+        # segments, so a long seek just flips visibility
+        if n and old_block != new_block:
+            start = old_block * self.block_size
+            self.blocks[old_block].set_segments(self.segments[start:start + self.block_size])
+            self.blocks[old_block].set_color(self.colors[start:start + self.block_size])
+
+        # Blocks before the current one are complete, those after it hidden
+        for b in range(min(old_block, new_block), max(old_block, new_block) + 1):
+            self.blocks[b].set_visible(b < new_block)
+        
+        # Partially revealed current block
+        if n:
+            start = new_block * self.block_size
+            end = max(idx - 1, start)
+            current = self.blocks[new_block]
+            current.set_segments(self.segments[start:end])
+            current.set_color(self.colors[start:end])
+            current.set_visible(end > start)
+        self.revealed = idx
+    
+    def update(self, snapshot):
+        """Update speed heatmap"""
+        row = snapshot.row(self.driver)
+        
+        # Reveal the track driven so far, then mark current position
+        self.reveal(int(snapshot.idx[row]))
+        self.current_marker.set_data([snapshot.x[row]], [snapshot.y[row]])
+    
+    def animated_artists(self):
+        """Artists changed by update, for blitting"""
+        return self.blocks + [self.current_marker]
 
 
 class CurrentSpeedometer:
@@ -180,22 +209,13 @@ class CurrentSpeedometer:
                      edgecolor='white', linewidth=2)
         )
     
-    def update(self, current_time):
+    def update(self, snapshot):
         """Update speedometer"""
-        pos = self.driver.get_position_at_time(current_time)
-        tel = self.driver.telemetry
+        row = snapshot.row(self.driver)
         
-        # Get current speed
-        if 'Speed' in tel.columns:
-            speed = tel.loc[pos['idx'], 'Speed']
-        else:
-            speed = 0
-        
-        # Get gear if available
-        if 'nGear' in tel.columns:
-            gear = int(tel.loc[pos['idx'], 'nGear'])
-        else:
-            gear = 0
+        # Get current speed and gear
+        speed = snapshot.speed[row]
+        gear = int(snapshot.gear[row])
         
         # Update displays
         self.speed_text.set_text(f"{int(speed)}")
@@ -208,4 +228,8 @@ class CurrentSpeedometer:
         # Fade if DNF
         alpha = 0.3 if self.driver.is_dnf() else 1.0
         self.speed_text.set_alpha(alpha)
-        self.gear_text.set_alpha(alpha)
\ No newline at end of file
+        self.gear_text.set_alpha(alpha)
+    
+    def animated_artists(self):
+        """Artists changed by update, for blitting"""
+        return [self.speed_text, self.gear_text]
\ No newline at end of file
@@ -0,0 +1,68 @@
+# startup.py
+# Startup phase timings (main.py --startup-report) and background preloading
+#
+# Kept free of numpy, pandas and matplotlib so importing it costs nothing.
+
+import importlib
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    #Wall time of each startup phase, from launch to the first frame on screen
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self.last = self.started
+        self.phases = []  # (name, seconds, spent waiting for input)
+        self.imports = {}  # module -> seconds, from the background preload
+        self.lock = threading.Lock()
+
+    def mark(self, phase, waiting=False):
+        """End the current phase; waiting phases are time spent at a prompt"""
+        now = self.clock()
+        self.phases.append((phase, now - self.last, waiting))
+        self.last = now
+
+    def imported(self, module, seconds):
+        with self.lock:
+            self.imports[module] = seconds
+
+    def text(self):
+        """Phase table, with a running total that leaves out the prompts"""
+        lines = [f" {'startup phase':<26}{'s':>8}{'total':>8}"]
+        total = 0.0
+        for name, seconds, waiting in self.phases:
+            if waiting:
+                lines.append(f" {name + ' (input)':<26}{seconds:8.2f}")
+                continue
+            total += seconds
+            lines.append(f" {name:<26}{seconds:8.2f}{total:8.2f}")
+        with self.lock:
+            imports = dict(self.imports)
+        if imports:
+            lines.append(" preloaded while waiting: " +
+                         ", ".join(f"{module} {seconds:.2f}s" for module, seconds in imports.items()))
+        return "\n".join(lines)
+
+
+def preload(modules, report=None):
+    """Import modules on a background thread; importing one early just waits for it"""
+    def run():
+        for module in modules:
+            start = time.perf_counter()
+            try:
+                importlib.import_module(module)
+            except Exception as e:  # Raised again where the module is really imported
+                logger.debug(f"Preloading {module} failed: {e}")
+                continue
+            if report is not None:
+                report.imported(module, time.perf_counter() - start)
+
+    thread = threading.Thread(target=run, name="preload", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,75 @@
+# streaming.py
+# Background telemetry feed for replays that start before loading finishes
+
+import queue
+import threading
+from Driver import Driver
+import logging
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class TelemetryStream:
+    #Runs a chunk generator on a worker thread and grows Driver objects
+
+    def __init__(self, chunks, driver_codes):
+        self.driver_codes = list(driver_codes)
+        self.drivers = {}
+        self.laps_loaded = 0
+        self.done = False
+        self._started = False
+        self._queue = queue.Queue()
+
+        self._thread = threading.Thread(target=self._run, args=(chunks,), daemon=True)
+        self._thread.start()
+
+    def _run(self, chunks):
+        #Worker thread: only produces chunks, Drivers are touched by the caller
+        try:
+            for item in chunks:
+                self._queue.put(item)
+        except Exception as e:
+            logger.error(f"Telemetry stream stopped: {e}")
+        finally:
+            self._queue.put(_DONE)
+
+    def _apply(self, item):
+        #Add one chunk to the drivers; returns False at the end of the stream
+        if item is _DONE:
+            self.done = True
+            logger.info(f"Telemetry stream finished after {self.laps_loaded} laps")
+            return False
+
+        last_lap, chunk = item
+        for code, (tel, lap_starts, team) in chunk.items():
+            driver = self.drivers.get(code)
+            if driver is not None:
+                driver.append_telemetry(tel, lap_starts)
+            elif not self._started:
+                self.drivers[code] = Driver(code, team, Driver.process_telemetry([tel], lap_starts))
+            else:
+                logger.debug(f"Ignoring {code}: no telemetry before the replay started")
+
+        self.laps_loaded = last_lap
+        return True
+
+    def wait_for_laps(self, laps):
+        """Block until at least `laps` laps are loaded; returns the drivers so far"""
+        while not self.done and self.laps_loaded < laps:
+            self._apply(self._queue.get())
+
+        self._started = True
+        return [self.drivers[code] for code in self.driver_codes if code in self.drivers]
+
+    def poll(self):
+        """Apply every chunk that has arrived, without blocking"""
+        updated = False
+        while not self.done:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            updated = self._apply(item) or updated
+        return updated
@@ -0,0 +1,227 @@
+# synthetic.py
+# Synthetic full-grid race telemetry for offline benchmarks (no FastF1 needed)
+
+import numpy as np
+import pandas as pd
+from Driver import Driver
+from sources import TelemetrySource
+
+GRID = [
+    ('VER', 'Red Bull Racing'), ('PER', 'Red Bull Racing'),
+    ('LEC', 'Ferrari'), ('SAI', 'Ferrari'),
+    ('HAM', 'Mercedes'), ('RUS', 'Mercedes'),
+    ('NOR', 'McLaren'), ('PIA', 'McLaren'),
+    ('ALO', 'Aston Martin'), ('STR', 'Aston Martin'),
+    ('GAS', 'Alpine'), ('OCO', 'Alpine'),
+    ('ALB', 'Williams'), ('SAR', 'Williams'),
+    ('TSU', 'Racing Bulls'), ('RIC', 'Racing Bulls'),
+    ('BOT', 'Kick Sauber'), ('ZHO', 'Kick Sauber'),
+    ('HUL', 'Haas F1 Team'), ('MAG', 'Haas F1 Team'),
+]
+
+# Sampling of the merged position and car data FastF1 returns: about 4 Hz
+# each, at unaligned timestamps
+NATIVE_RATE = 8.0
+
+# Car model (SI units)
+TOP_SPEED = 92.0  # m/s, about 330 km/h
+LATERAL_ACCEL = 40.0
+TRACTION_ACCEL = 11.0
+BRAKING_DECEL = 45.0
+GEAR_TOP_SPEEDS = np.array([22, 32, 42, 52, 62, 72, 82, 100]) * 1.0  # m/s
+IDLE_RPM, MAX_RPM = 4000.0, 12200.0
+
+
+class SyntheticCircuit:
+    #A closed circuit with a speed, throttle and brake profile along its length
+    #
+    # Built turtle-style from straights and constant-radius corners; the
+    # straights are stretched just enough for the lap to close.
+
+    def __init__(self, corners=14, step=1.0, seed=0):
+        rng = np.random.default_rng(seed)
+        while True:
+            # Mostly left-handers that add up to one full turn
+            angles = rng.uniform(0.3, 2.6, corners) * rng.choice([1, 1, 1, -1], corners)
+            angles *= 2 * np.pi / angles.sum()
+            radii = rng.uniform(12, 200, corners)
+            straights = self._closing_straights(rng.uniform(100, 700, corners), angles, radii)
+            if np.all(np.abs(angles) < 3.0) and straights is not None:
+                break
+
+        # Curvature along the lap, then integrate heading and position
+        parts = []
+        for length, angle, radius in zip(straights, angles, radii):
+            arc = max(int(abs(angle) * radius / step), 1)
+            parts += [np.zeros(int(length / step)), np.full(arc, angle / (arc * step))]
+        curvature = np.concatenate(parts)
+        heading = np.cumsum(curvature) * step
+        self.s = np.arange(len(curvature)) * step
+        self.length = len(curvature) * step
+
+        # Spread the rounding error of the segment lengths so the lap closes exactly
+        x = np.cumsum(np.cos(heading)) * step
+        y = np.cumsum(np.sin(heading)) * step
+        self.x = x - x[-1] * (self.s + step) / self.length
+        self.y = y - y[-1] * (self.s + step) / self.length
+
+        self.speed, self.throttle, self.brake = self._speed_profile(np.abs(curvature), step)
+        self.lap_time = float(np.sum(step / self.speed))
+
+        # DRS on the longest full-throttle run
+        self.drs = np.zeros(len(self.s), dtype=bool)
+        self.drs[self._longest_run(self.throttle > 99)] = True
+
+    @staticmethod
+    def _closing_straights(lengths, angles, radii):
+        #Smallest change to the straight lengths that brings the car back to the start
+        heading = np.concatenate(([0.0], np.cumsum(angles)[:-1]))
+        after = heading + angles / 2
+        chord = 2 * radii * np.sin(np.abs(angles) / 2)
+        gap = (np.stack((np.cos(heading), np.sin(heading))) * lengths).sum(axis=1) + \
+              (np.stack((np.cos(after), np.sin(after))) * chord).sum(axis=1)
+        directions = np.stack((np.cos(heading), np.sin(heading)))
+        change = -directions.T @ np.linalg.solve(directions @ directions.T, gap)
+        lengths = lengths + change
+        return lengths if lengths.min() >= 50 else None
+
+    @staticmethod
+    def _speed_profile(curvature, step):
+        #Corner speed limits, then acceleration and braking limits around the lap
+        limit = np.minimum(TOP_SPEED, np.sqrt(LATERAL_ACCEL / np.maximum(curvature, 1e-6)))
+
+        n = len(limit)
+        speed = limit.copy()
+        for _ in range(2):  # Twice round so the lap closes on itself
+            for i in range(1, 2 * n):
+                j, prev = i % n, (i - 1) % n
+                speed[j] = min(speed[j], np.sqrt(speed[prev]**2 + 2 * TRACTION_ACCEL * step))
+            for i in range(2 * n - 2, -1, -1):
+                j, nxt = i % n, (i + 1) % n
+                speed[j] = min(speed[j], np.sqrt(speed[nxt]**2 + 2 * BRAKING_DECEL * step))
+
+        accel = np.diff(speed**2, append=speed[0]**2) / (2 * step)
+        throttle = np.where(accel > -1.0, np.clip(40 + 60 * accel / TRACTION_ACCEL, 40, 100), 0.0)
+        throttle[speed >= TOP_SPEED - 0.5] = 100.0
+        brake = accel < -0.5 * BRAKING_DECEL
+        return speed, throttle, brake
+
+    @staticmethod
+    def _longest_run(mask):
+        #Slice of the longest run of True values
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+        starts, stops = edges[::2], edges[1::2]
+        if not len(starts):
+            return slice(0, 0)
+        longest = np.argmax(stops - starts)
+        return slice(int(starts[longest]), int(stops[longest]))
+
+    def track(self, rate=4.0):
+        """Reference lap as a telemetry-like X/Y DataFrame (the replay's track map)"""
+        t = np.arange(0.0, self.lap_time, 1.0 / rate)
+        s = np.interp(t, np.cumsum(1.0 / self.speed) * (self.s[1] - self.s[0]), self.s)
+        return pd.DataFrame({'X': np.interp(s, self.s, self.x) * 10,
+                             'Y': np.interp(s, self.s, self.y) * 10})
+
+
+def driver_telemetry(circuit, laps, pace=1.0, rate=4.0, jitter=False, seed=0):
+    """Race telemetry for one car as (DataFrame, lap_starts), like SessionLoader's bulk path"""
+    rng = np.random.default_rng(seed)
+    step = circuit.s[1] - circuit.s[0]
+    lap_profile = np.cumsum(step / circuit.speed)
+
+    # Lap by lap time along the distance grid, with some lap-to-lap variation
+    factors = pace * (1 + rng.normal(0, 0.003, laps))
+    lap_times = lap_profile[-1] * factors
+    lap_starts = np.concatenate(([0.0], np.cumsum(lap_times)[:-1]))
+    cum_time = (lap_profile[None, :] * factors[:, None] + lap_starts[:, None]).ravel()
+    cum_dist = (circuit.s[None, :] + circuit.length * np.arange(laps)[:, None]).ravel()
+
+    # Sample times: regular, or the unaligned position/car timestamps of a real merge
+    end = lap_starts[-1] + lap_times[-1]
+    if jitter:
+        t = np.sort(rng.uniform(0, end, int(end * rate)))
+    else:
+        t = np.arange(0.0, end, 1.0 / rate)
+    dist = np.interp(t, cum_time, cum_dist)
+    lap_pos = dist % circuit.length
+
+    speed = np.interp(lap_pos, circuit.s, circuit.speed) / np.interp(t, lap_starts, factors)
+    gear = np.searchsorted(GEAR_TOP_SPEEDS, speed).clip(0, 7)
+    gear_low = np.concatenate(([0.0], GEAR_TOP_SPEEDS))[gear]
+    gear_span = GEAR_TOP_SPEEDS[gear] - gear_low
+    rpm = IDLE_RPM + (MAX_RPM - IDLE_RPM) * (0.55 + 0.45 * (speed - gear_low) / gear_span)
+
+    # DRS is enabled from the third lap
+    in_drs = (np.interp(lap_pos, circuit.s, circuit.drs.astype(float)) > 0.5) & \
+             (t >= lap_starts[min(2, laps - 1)])
+
+    tel = pd.DataFrame({
+        't': t,
+        'X': np.interp(lap_pos, circuit.s, circuit.x) * 10 + rng.normal(0, 2, len(t)),
+        'Y': np.interp(lap_pos, circuit.s, circuit.y) * 10 + rng.normal(0, 2, len(t)),
+        'Speed': speed * 3.6 + rng.normal(0, 1.0, len(t)),
+        'Throttle': np.clip(np.interp(lap_pos, circuit.s, circuit.throttle)
+                            + rng.normal(0, 2, len(t)), 0, 100),
+        'Brake': np.interp(lap_pos, circuit.s, circuit.brake.astype(float)) > 0.5,
+        'nGear': gear + 1,
+        'RPM': rpm + rng.normal(0, 80, len(t)),
+        'DRS': np.where(in_drs, 12, 0),
+    })
+    tel['Time'] = pd.to_timedelta(tel['t'], unit='s')
+    return tel, lap_starts.tolist()
+
+
+def synthetic_grid(drivers=20, laps=60, rate=4.0, jitter=False, retirements=2, seed=0):
+    """Raw telemetry per car as [(code, team, telemetry, lap_starts)]
+
+    The last `retirements` cars stop partway through, so DNF handling is
+    exercised as well.
+    """
+    circuit = SyntheticCircuit(seed=seed)
+    grid = []
+    for i in range(drivers):
+        code, team = GRID[i % len(GRID)]
+        if i >= len(GRID):
+            code = f"{code[:2]}{i}"
+        car_laps = laps
+        if i >= drivers - retirements:
+            car_laps = max(int(laps * (0.3 + 0.5 * (drivers - 1 - i) / max(retirements, 1))), 1)
+        tel, lap_starts = driver_telemetry(circuit, car_laps, pace=1 + 0.0015 * i,
+                                           rate=rate, jitter=jitter, seed=seed + i + 1)
+        grid.append((code, team, tel, lap_starts))
+    return circuit, grid
+
+
+def synthetic_race(drivers=20, laps=60, rate=4.0, jitter=False, retirements=2, seed=0):
+    """Processed Driver objects and the reference track for a synthetic race"""
+    circuit, grid = synthetic_grid(drivers, laps, rate, jitter, retirements, seed)
+    field = [Driver(code, team, Driver.process_telemetry([tel], lap_starts))
+             for code, team, tel, lap_starts in grid]
+    return field, circuit.track()
+
+
+class SyntheticSource(TelemetrySource):
+    #A synthetic_grid race served like a loaded session, for SessionLoader benchmarks
+
+    def __init__(self, circuit, grid):
+        super().__init__()
+        self.year, self.round_number, self.session_type = 0, 0, 'R'
+        self.circuit = circuit
+        self.grid = {code: (tel, lap_starts, team) for code, team, tel, lap_starts in grid}
+
+    def load(self):
+        return True
+
+    def driver_teams(self):
+        return {code: team for code, (_, _, team) in self.grid.items()}
+
+    def lap_starts(self, driver_code):
+        return self.grid[driver_code][1]
+
+    def driver_telemetry(self, driver_code, replay_mode, columns=None):
+        tel, lap_starts, team = self.grid[driver_code]
+        return [tel], lap_starts, team
+
+    def reference_track(self):
+        return self.circuit.track()
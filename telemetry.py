@@ -1,5 +1,6 @@
 
 import matplotlib.pyplot as plt
+from matplotlib.transforms import Affine2D
 from config import TEAM_COLORS
 import numpy as np
 
@@ -13,26 +14,29 @@ class ThrottleBrakeTrace:
         self.window_seconds = window_seconds
         self.throttle_lines = {}
         self.brake_lines = {}
-        self.data = {d.code: {'times': [], 'throttle': [], 'brake': []} 
-                     for d in drivers}
         
         self.setup_axes()
     
     def setup_axes(self):
         """Setup axes for throttle/brake"""
         self.ax.set_title("Throttle & Brake Input (%)", fontsize=11, fontweight='bold')
-        self.ax.set_xlabel("Time (s)", fontsize=9)
+        self.ax.set_xlabel("Time relative to now (s)", fontsize=9)
         self.ax.set_ylabel("Input %", fontsize=9)
         self.ax.set_ylim(0, 105)
         self.ax.grid(True, alpha=0.3, linestyle='--')
         
+        # Fixed axis: the lines are shifted so the current time sits at 0
+        self.ax.set_xlim(-self.window_seconds, 1)
+        self.shift = Affine2D()
+        
         for driver in self.drivers:
             color = TEAM_COLORS.get(driver.team, "#888888")
             
             # Throttle (solid line)
             throttle_line, = self.ax.plot([], [], color=color, 
                                          linewidth=1.5, alpha=0.7,
-                                         label=f"{driver.code} Throttle")
+                                         label=f"{driver.code} Throttle",
+                                         transform=self.shift + self.ax.transData)
             self.throttle_lines[driver.code] = throttle_line
             
             # Brake (dashed line, red tint)
@@ -40,44 +44,38 @@ class ThrottleBrakeTrace:
             brake_line, = self.ax.plot([], [], color=brake_color, 
                                       linewidth=1.5, alpha=0.7,
                                       linestyle='--',
-                                      label=f"{driver.code} Brake")
+                                      label=f"{driver.code} Brake",
+                                      transform=self.shift + self.ax.transData)
             self.brake_lines[driver.code] = brake_line
         
         self.ax.legend(loc='upper left', fontsize=7, ncol=2)
     
-    def update(self, current_time):
+    def update(self, snapshot):
         """Update throttle/brake traces"""
+        current_time = snapshot.time
         min_time = max(0, current_time - self.window_seconds)
         
         for driver in self.drivers:
-            pos = driver.get_position_at_time(current_time)
-            tel = driver.telemetry
-            
-            # Get inputs
-            throttle = tel.loc[pos['idx'], 'Throttle'] if 'Throttle' in tel.columns else 0
-            brake = tel.loc[pos['idx'], 'Brake'] if 'Brake' in tel.columns else 0
-            
-            # Store data
-            data = self.data[driver.code]
-            data['times'].append(current_time)
-            data['throttle'].append(throttle)
-            data['brake'].append(brake)
-            
-            # Trim old data
-            while data['times'] and data['times'][0] < min_time:
-                data['times'].pop(0)
-                data['throttle'].pop(0)
-                data['brake'].pop(0)
+            # Inputs inside the window, as views into the driver's arrays
+            window = driver.window(min_time, current_time)
+            times = driver.t[window]
             
             # Update lines
             alpha = 0.3 if driver.is_dnf() else 0.7
-            self.throttle_lines[driver.code].set_data(data['times'], data['throttle'])
+            self.throttle_lines[driver.code].set_data(
+                times, driver.window_values('Throttle', window))
             self.throttle_lines[driver.code].set_alpha(alpha)
             
-            self.brake_lines[driver.code].set_data(data['times'], data['brake'])
+            self.brake_lines[driver.code].set_data(
+                times, driver.window_values('Brake', window))
             self.brake_lines[driver.code].set_alpha(alpha)
         
-        self.ax.set_xlim(min_time, current_time + 1)
+        # Slide the window instead of the axis
+        self.shift.clear().translate(-current_time, 0)
+    
+    def animated_artists(self):
+        """Artists changed by update, for blitting"""
+        return list(self.throttle_lines.values()) + list(self.brake_lines.values())
 
 
 class GearTrace:
@@ -88,55 +86,53 @@ class GearTrace:
         self.drivers = drivers
         self.window_seconds = window_seconds
         self.lines = {}
-        self.data = {d.code: {'times': [], 'gears': []} for d in drivers}
         
         self.setup_axes()
     
     def setup_axes(self):
         """Setup gear trace axes"""
         self.ax.set_title("Gear Selection", fontsize=9, fontweight='bold')
-        self.ax.set_xlabel("Time (s)", fontsize=7)
+        self.ax.set_xlabel("Time relative to now (s)", fontsize=7)
         self.ax.set_ylabel("Gear", fontsize=7)
         self.ax.set_ylim(0, 9)
         self.ax.set_yticks(range(0, 9))
         self.ax.grid(True, alpha=0.3, linestyle='--', axis='y')
         
+        # Static time axis, the lines slide instead
+        self.ax.set_xlim(-self.window_seconds, 1)
+        self.shift = Affine2D()
+        
         for driver in self.drivers:
             color = TEAM_COLORS.get(driver.team, "#888888")
             line, = self.ax.plot([], [], color=color, linewidth=2, 
                                marker='o', markersize=3,
-                               label=driver.code, alpha=0.7)
+                               label=driver.code, alpha=0.7,
+                               transform=self.shift + self.ax.transData)
             self.lines[driver.code] = line
         
         self.ax.legend(loc='upper left', fontsize=8, ncol=3)
     
-    def update(self, current_time):
+    def update(self, snapshot):
         #Update gear traces
+        current_time = snapshot.time
         min_time = max(0, current_time - self.window_seconds)
         
         for driver in self.drivers:
-            pos = driver.get_position_at_time(current_time)
-            tel = driver.telemetry
-            
-            # Get gear
-            gear = tel.loc[pos['idx'], 'nGear'] if 'nGear' in tel.columns else 0
-            
-            # Store data
-            data = self.data[driver.code]
-            data['times'].append(current_time)
-            data['gears'].append(gear)
-            
-            # Trim old data
-            while data['times'] and data['times'][0] < min_time:
-                data['times'].pop(0)
-                data['gears'].pop(0)
+            # Gears inside the window
+            window = driver.window(min_time, current_time)
             
             # Update line
             alpha = 0.3 if driver.is_dnf() else 0.7
-            self.lines[driver.code].set_data(data['times'], data['gears'])
+            self.lines[driver.code].set_data(driver.t[window],
+                                             driver.window_values('nGear', window))
             self.lines[driver.code].set_alpha(alpha)
         
-        self.ax.set_xlim(min_time, current_time + 1)
+        # Slide the window instead of the axis
+        self.shift.clear().translate(-current_time, 0)
+    
+    def animated_artists(self):
+        """Artists changed by update, for blitting"""
+        return list(self.lines.values())
 
 
 class RPMTrace:
@@ -147,14 +143,13 @@ class RPMTrace:
         self.drivers = drivers
         self.window_seconds = window_seconds
         self.lines = {}
-        self.data = {d.code: {'times': [], 'rpm': []} for d in drivers}
         
         self.setup_axes()
     
     def setup_axes(self):
         #Setup RPM trace axes
         self.ax.set_title("Engine RPM", fontsize=11, fontweight='bold')
-        self.ax.set_xlabel("Time (s)", fontsize=9)
+        self.ax.set_xlabel("Time relative to now (s)", fontsize=9)
         self.ax.set_ylabel("RPM", fontsize=9)
         self.ax.set_ylim(8000, 13000)  # F1 typical range
         self.ax.grid(True, alpha=0.3, linestyle='--')
@@ -163,41 +158,40 @@ class RPMTrace:
         self.ax.axhline(y=12000, color='red', linestyle=':', 
                        linewidth=1, alpha=0.5, label='Red Line')
         
+        # Window-relative time, like the other traces
+        self.ax.set_xlim(-self.window_seconds, 1)
+        self.shift = Affine2D()
+        
         for driver in self.drivers:
             color = TEAM_COLORS.get(driver.team, "#888888")
             line, = self.ax.plot([], [], color=color, linewidth=1.5,
-                               label=driver.code, alpha=0.7)
+                               label=driver.code, alpha=0.7,
+                               transform=self.shift + self.ax.transData)
             self.lines[driver.code] = line
         
         self.ax.legend(loc='lower left', fontsize=8, ncol=3)
     
-    def update(self, current_time):
+    def update(self, snapshot):
         """Update RPM traces"""
+        current_time = snapshot.time
         min_time = max(0, current_time - self.window_seconds)
         
         for driver in self.drivers:
-            pos = driver.get_position_at_time(current_time)
-            tel = driver.telemetry
-            
-            # Get RPM
-            rpm = tel.loc[pos['idx'], 'RPM'] if 'RPM' in tel.columns else 10000
-            
-            # Store data
-            data = self.data[driver.code]
-            data['times'].append(current_time)
-            data['rpm'].append(rpm)
-            
-            # Trim old data
-            while data['times'] and data['times'][0] < min_time:
-                data['times'].pop(0)
-                data['rpm'].pop(0)
+            # RPM inside the window
+            window = driver.window(min_time, current_time)
             
             # Update line
             alpha = 0.3 if driver.is_dnf() else 0.7
-            self.lines[driver.code].set_data(data['times'], data['rpm'])
+            self.lines[driver.code].set_data(driver.t[window],
+                                             driver.window_values('RPM', window, 10000))
             self.lines[driver.code].set_alpha(alpha)
         
-        self.ax.set_xlim(min_time, current_time + 1)
+        # Slide the window instead of the axis
+        self.shift.clear().translate(-current_time, 0)
+    
+    def animated_artists(self):
+        """Artists changed by update, for blitting"""
+        return list(self.lines.values())
 
 
 class DRSIndicator:
@@ -234,16 +228,10 @@ class DRSIndicator:
             fontsize=12, fontweight='bold', color='white'
         )
     
-    def update(self, current_time):
+    def update(self, snapshot):
         """Update DRS indicator"""
-        pos = self.driver.get_position_at_time(current_time)
-        tel = self.driver.telemetry
-        
         # Check DRS status
-        drs_active = False
-        if 'DRS' in tel.columns:
-            drs_value = tel.loc[pos['idx'], 'DRS']
-            drs_active = drs_value > 0
+        drs_active = snapshot.drs[snapshot.row(self.driver)] > 0
         
         # Update indicator
         if drs_active:
@@ -260,4 +248,8 @@ class DRSIndicator:
         # Fade if DNF
         if self.driver.is_dnf():
             self.indicator.set_alpha(0.2)
-            self.status_text.set_alpha(0.3)
\ No newline at end of file
+            self.status_text.set_alpha(0.3)
+    
+    def animated_artists(self):
+        """Artists changed by update, for blitting"""
+        return [self.indicator, self.status_text]
@@ -0,0 +1,136 @@
+# telemetry_cache.py
+# On-disk cache of fully processed telemetry, reloaded with memory mapping
+
+import json
+import os
+import shutil
+import threading
+import time
+import numpy as np
+import pandas as pd
+from Driver import Driver
+from config import PROCESSED_CACHE_DIR, PROCESSED_CACHE_VERSION
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TelemetryCache:
+    #Processed telemetry stored as one .npy file per column
+    #
+    # Layout: <root>/v<version>/<year>_<round>_<session>/
+    #             session.json               driver list and teams
+    #             track/X.npy, track/Y.npy   reference track
+    #             <mode>/<driver>/meta.json  team and lap starts
+    #             <mode>/<driver>/<column>.npy
+
+    def __init__(self, root=PROCESSED_CACHE_DIR, version=PROCESSED_CACHE_VERSION):
+        self.root = root
+        self.version = version
+        self.version_dir = os.path.join(root, f"v{version}")
+
+    def session_dir(self, year, round_number, session_type):
+        return os.path.join(self.version_dir, f"{year}_{round_number:02d}_{session_type}")
+
+    def driver_dir(self, year, round_number, session_type, replay_mode, driver_code):
+        return os.path.join(self.session_dir(year, round_number, session_type),
+                            replay_mode, driver_code)
+
+    def load_session_info(self, year, round_number, session_type):
+        """Cached {driver code: team} mapping for a session, or None"""
+        path = os.path.join(self.session_dir(year, round_number, session_type), "session.json")
+        try:
+            with open(path) as f:
+                return json.load(f)["drivers"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save_session_info(self, year, round_number, session_type, drivers):
+        session_dir = self.session_dir(year, round_number, session_type)
+        os.makedirs(session_dir, exist_ok=True)
+        self._write_json(os.path.join(session_dir, "session.json"), {"drivers": drivers})
+
+    def load_driver(self, year, round_number, session_type, replay_mode, driver_code):
+        """Memory-map a cached driver, or return None on a miss"""
+        path = self.driver_dir(year, round_number, session_type, replay_mode, driver_code)
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+            columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+                       for name in meta["columns"]}
+        except (OSError, ValueError, KeyError):
+            return None
+
+        return Driver.from_columns(driver_code, meta["team"], columns, meta["lap_starts"])
+
+    def save_driver(self, year, round_number, session_type, replay_mode, driver):
+        path = self.driver_dir(year, round_number, session_type, replay_mode, driver.code)
+        meta = {
+            "team": driver.team,
+            "lap_starts": driver.lap_starts.tolist(),
+            "columns": list(driver.columns),
+        }
+        self._write_arrays(path, driver.columns, meta)
+
+    def load_track(self, year, round_number, session_type):
+        """Cached reference track as a DataFrame with X and Y, or None"""
+        path = os.path.join(self.session_dir(year, round_number, session_type), "track")
+        try:
+            return pd.DataFrame({name: np.load(os.path.join(path, f"{name}.npy"))
+                                 for name in ("X", "Y")})
+        except (OSError, ValueError):
+            return None
+
+    def save_track(self, year, round_number, session_type, track_telemetry):
+        path = os.path.join(self.session_dir(year, round_number, session_type), "track")
+        columns = {name: track_telemetry[name].to_numpy(dtype=np.float64)
+                   for name in ("X", "Y")}
+        self._write_arrays(path, columns)
+
+    def clear(self):
+        """Remove every cached entry, for all code versions"""
+        if os.path.isdir(self.root):
+            shutil.rmtree(self.root)
+            logger.info(f"Cleared processed telemetry cache at {self.root}")
+
+    def prune(self, max_age_days=None):
+        """Drop entries from old code versions and, optionally, old sessions"""
+        if not os.path.isdir(self.root):
+            return 0
+
+        removed = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if path != self.version_dir and os.path.isdir(path):
+                shutil.rmtree(path)
+                removed += 1
+
+        if max_age_days is not None and os.path.isdir(self.version_dir):
+            cutoff = time.time() - max_age_days * 86400
+            for name in os.listdir(self.version_dir):
+                path = os.path.join(self.version_dir, name)
+                if os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path)
+                    removed += 1
+
+        logger.info(f"Pruned {removed} entries from processed telemetry cache")
+        return removed
+
+    def _write_arrays(self, path, columns, meta=None):
+        #Write into a temporary directory, then swap it in atomically
+        tmp_path = f"{path}.tmp{os.getpid()}-{threading.get_ident()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        for name, values in columns.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(values))
+        if meta is not None:
+            self._write_json(os.path.join(tmp_path, "meta.json"), meta)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _write_json(path, data):
+        with open(path, "w") as f:
+            json.dump(data, f)
@@ -0,0 +1,173 @@
+# timeline.py
+# Shared race timeline: every driver resampled onto one FPS-aligned time grid
+
+import numpy as np
+from config import FPS, TIMELINE_CHUNK_SECONDS
+
+# Values used when a driver's telemetry lacks a channel
+CHANNEL_DEFAULTS = {
+    'Speed': 0,
+    'Throttle': 0,
+    'Brake': 0,
+    'nGear': 0,
+    'RPM': 10000,
+    'DRS': 0,
+}
+
+
+class RaceTimeline:
+    #Drivers x frames grid of sample indices built once after loading
+    #
+    # Every channel at a frame is the driver's sample at the grid index, so
+    # only the index and the completed lap count are stored (6 bytes per
+    # driver and frame, about 26MB for 20 cars over 2 hours at 30 FPS);
+    # snapshots read the channels from the drivers' own columns.
+
+    def __init__(self, drivers, fps=FPS, max_time=None):
+        self.drivers = drivers
+        self.fps = fps
+        self.index = {d.code: i for i, d in enumerate(drivers)}
+
+        self._idx = None
+        self._laps_done = None
+        self._allocate(max_time if max_time is not None
+                       else max(d.end_time for d in drivers))
+
+        # (end time, lap count) each driver was last resampled with
+        self._resampled = []
+        for i, driver in enumerate(drivers):
+            self._resample(i, driver)
+            self._resampled.append((driver.end_time, driver.total_laps))
+
+    def _allocate(self, max_time):
+        """Size the grid for max_time, keeping already resampled frames"""
+        self.max_time = max_time
+        self.n_frames = int(max_time * self.fps) + 1
+        self.times = np.arange(self.n_frames) / self.fps
+
+        # A streamed race grows a fixed chunk at a time, so at most one chunk
+        # is allocated ahead of the data
+        if self._idx is None or self._idx.shape[1] < self.n_frames:
+            capacity = self.n_frames
+            if self._idx is not None:
+                capacity += int(TIMELINE_CHUNK_SECONDS * self.fps)
+            shape = (len(self.drivers), capacity)
+            idx = np.empty(shape, dtype=np.int32)
+            laps_done = np.empty(shape, dtype=np.int16)
+            if self._idx is not None:
+                idx[:, :self._idx.shape[1]] = self._idx
+                laps_done[:, :self._laps_done.shape[1]] = self._laps_done
+            self._idx, self._laps_done = idx, laps_done
+        self.idx = self._idx[:, :self.n_frames]
+        self.laps_done = self._laps_done[:, :self.n_frames]
+
+    def extend(self, max_time):
+        """Grow the grid after drivers received more telemetry"""
+        old_frames = self.n_frames
+        self._allocate(max(max_time, self.max_time))
+
+        for i, driver in enumerate(self.drivers):
+            end_time, total_laps = self._resampled[i]
+            start = old_frames
+
+            # Frames past the driver's old end were clamped to its last sample
+            if driver.end_time != end_time or driver.total_laps != total_laps:
+                start_time = end_time
+                if driver.total_laps > total_laps:
+                    start_time = min(start_time, driver.lap_starts[total_laps])
+                start = min(start, max(int(start_time * self.fps), 0))
+
+            if start < self.n_frames:
+                self._resample(i, driver, start)
+            self._resampled[i] = (driver.end_time, driver.total_laps)
+
+    def _resample(self, row, driver, start=0):
+        """Sample one driver's telemetry at every grid time from frame start"""
+        times = self.times[start:]
+
+        # Same sample selection as Driver.get_position_at_time
+        self.idx[row, start:] = np.minimum(np.searchsorted(driver.t, times), len(driver) - 1)
+        self.laps_done[row, start:] = driver.lap_starts.searchsorted(times, side='right')
+
+    def frame_index(self, current_time):
+        """Grid frame closest to a replay time"""
+        frame = int(round(current_time * self.fps))
+        return min(max(frame, 0), self.n_frames - 1)
+
+    def snapshot(self, current_time):
+        """Build the FrameSnapshot shared by all widgets for one frame"""
+        return FrameSnapshot(self, current_time)
+
+
+class FrameSnapshot:
+    #Every driver's state at one replay time, computed once per frame
+    #
+    # Channels are read from the drivers' columns on first use, so a frame
+    # only pays for the ones its widgets look at.
+
+    __slots__ = ('time', 'frame', 'index', 'drivers', 'laps_done', 'idx', '_channels')
+
+    def __init__(self, timeline, current_time):
+        self.time = current_time
+        self.frame = timeline.frame_index(current_time)
+        self.index = timeline.index
+        self.drivers = timeline.drivers
+
+        # One entry per driver row
+        self.laps_done = timeline.laps_done[:, self.frame].astype(np.intp)
+        self.idx = timeline.idx[:, self.frame].astype(np.intp)
+        self._channels = {}
+
+    def channel(self, name):
+        """Every driver's value of a telemetry channel at this frame"""
+        values = self._channels.get(name)
+        if values is None:
+            default = CHANNEL_DEFAULTS.get(name, 0)
+            values = np.array([driver.value_at(name, i, default)
+                               for driver, i in zip(self.drivers, self.idx)], dtype=float)
+            self._channels[name] = values
+        return values
+
+    @property
+    def x(self):
+        return self.channel('X')
+
+    @property
+    def y(self):
+        return self.channel('Y')
+
+    @property
+    def dist(self):
+        return self.channel('dist')
+
+    @property
+    def race_time(self):
+        return self.channel('race_time')
+
+    @property
+    def speed(self):
+        return self.channel('Speed')
+
+    @property
+    def throttle(self):
+        return self.channel('Throttle')
+
+    @property
+    def brake(self):
+        return self.channel('Brake')
+
+    @property
+    def gear(self):
+        return self.channel('nGear').astype(np.int8)
+
+    @property
+    def rpm(self):
+        return self.channel('RPM')
+
+    @property
+    def drs(self):
+        return self.channel('DRS')
+
+    def row(self, driver):
+        """Row of a driver in the snapshot arrays"""
+        return self.index[driver.code]
@@ -1,6 +1,9 @@
 
+import numpy as np
 import matplotlib.pyplot as plt
-from config import TEAM_COLORS, SHOW_TRAILS
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba
+from config import TEAM_COLORS, SHOW_TRAILS, TRAIL_LENGTH, TRAIL_FADE
 
 
 class TrackMap:
@@ -12,7 +15,10 @@ class TrackMap:
         self.drivers = drivers
         self.points = {}
         self.lines = {}
+        self.trail_colors = {}
         self.show_trails = SHOW_TRAILS
+        self.trail_length = TRAIL_LENGTH
+        self.trail_fade = TRAIL_FADE
         
         self.setup_track()
         
@@ -39,32 +45,65 @@ class TrackMap:
                 [], [], "o", color=color, markersize=10, 
                 markeredgecolor='white', markeredgewidth=1.5, zorder=10
             )
-            self.lines[driver.code], = self.ax.plot(
-                [], [], color=color, lw=2, alpha=0.7
-            )
+            if self.trail_fade:
+                # One color per segment, from transparent tail to the car
+                colors = np.tile(to_rgba(color), (self.trail_length, 1))
+                colors[:, 3] = np.linspace(0.0, 0.7, self.trail_length)
+                self.trail_colors[driver.code] = colors
+                self.lines[driver.code] = self.ax.add_collection(
+                    LineCollection([], colors=colors, linewidths=2), autolim=False
+                )
+            else:
+                self.lines[driver.code], = self.ax.plot(
+                    [], [], color=color, lw=2, alpha=0.7
+                )
     
-    def update(self, current_time):
+    def update(self, snapshot):
         #Update driver positions on track
         for driver in self.drivers:
-            pos = driver.get_position_at_time(current_time)
+            row = snapshot.row(driver)
             
             # Set alpha based on DNF status
             alpha = 0.3 if driver.is_dnf() else 1.0
             
             # Update position marker
-            self.points[driver.code].set_data([pos['x']], [pos['y']])
+            self.points[driver.code].set_data([snapshot.x[row]], [snapshot.y[row]])
             self.points[driver.code].set_alpha(alpha)
             
             # Update trail if enabled
             if self.show_trails:
-                idx = pos['idx']
-                tel = driver.telemetry
-                self.lines[driver.code].set_data(tel["X"][:idx], tel["Y"][:idx])
-                self.lines[driver.code].set_alpha(alpha)
+                self.update_trail(driver, int(snapshot.idx[row]), alpha)
+    
+    def update_trail(self, driver, idx, alpha):
+        #Draw the last trail_length samples behind the car from array views
+        start = max(idx - self.trail_length, 0)
+        x = driver.channel("X")[start:idx]
+        y = driver.channel("Y")[start:idx]
+        trail = self.lines[driver.code]
+        
+        if not self.trail_fade:
+            trail.set_data(x, y)
+            trail.set_alpha(alpha)
+            return
+        
+        # Segments between consecutive samples, brightest next to the car
+        points = np.column_stack((x, y))
+        n = max(len(points) - 1, 0)
+        colors = self.trail_colors[driver.code][self.trail_length - n:]
+        if alpha < 1.0:
+            colors = colors * (1.0, 1.0, 1.0, alpha)
+        trail.set_segments(np.stack((points[:-1], points[1:]), axis=1))
+        trail.set_color(colors)
+    
+    def animated_artists(self):
+        """Artists changed by update, for blitting"""
+        return list(self.lines.values()) + list(self.points.values())
     
     def toggle_trails(self):
         #Toggle trail visibility
         self.show_trails = not self.show_trails
+        for trail in self.lines.values():
+            trail.set_visible(self.show_trails)
         return self.show_trails
 
 
@@ -74,20 +113,25 @@ class LapCounter:
     def __init__(self, ax, drivers):
         self.ax = ax
         self.drivers = drivers
+        # Hangs from the top so the box stays inside the axes (and its blit region)
         self.text = self.ax.text(
-            0.02, 0.98, "Lap 1", transform=self.ax.transAxes, 
+            0.02, 0.98, "Lap 1", transform=self.ax.transAxes, va='top',
             fontsize=16, fontweight='bold', 
             bbox=dict(facecolor='white', alpha=0.9, 
                      edgecolor='black', linewidth=2, boxstyle='round,pad=0.5')
         )
     
-    def update(self, current_time):
+    def update(self, snapshot):
         #Update lap counter
         max_lap = 1
         for driver in self.drivers:
-            if driver.is_dnf() and current_time > driver.dnf_time:
+            if driver.is_dnf() and snapshot.time > driver.dnf_time:
                 continue  # Skip DNF drivers
-            current_lap = driver.get_current_lap(current_time)
+            current_lap = int(snapshot.laps_done[snapshot.row(driver)])
             max_lap = max(max_lap, current_lap)
         
-        self.text.set_text(f"Lap {max_lap}")
\ No newline at end of file
+        self.text.set_text(f"Lap {max_lap}")
+    
+    def animated_artists(self):
+        """Artists changed by update, for blitting"""
+        return [self.text]
\ No newline at end of file
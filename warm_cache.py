@@ -0,0 +1,204 @@
+# warm_cache.py
+# Non-interactive batch preprocessing that fills the on-disk caches ahead of time
+#
+#   python warm_cache.py 2024                          # every round, race, RACE mode
+#   python warm_cache.py 2024 --rounds 1-6 --sessions R,Q --modes RACE,FASTEST
+#
+# Progress is saved after every session, so an interrupted run picks up
+# where it stopped; --force redoes sessions already marked done.
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from config import WARM_WORKERS, WARM_PROGRESS_FILE
+
+logger = logging.getLogger(__name__)
+
+SESSION_TYPES = ["R", "Q", "P", "FP1", "FP2", "FP3", "SQ"]
+REPLAY_MODES = ["RACE", "FASTEST"]
+
+
+def _init_worker(level):
+    logging.basicConfig(level=level, format='%(asctime)s - %(process)d - %(name)s - %(message)s')
+
+
+def warm_session(year, round_number, session_type, modes):
+    """Load and cache every driver of one session; returns a progress entry"""
+    from data_loader import SessionLoader, LOADED, NO_DATA, FAILED  # Workers import FastF1 themselves
+
+    start = time.time()
+    loader = SessionLoader(year, round_number, session_type)
+    if not loader.load_session():
+        return {'status': 'failed', 'error': "session could not be loaded"}
+
+    codes = loader.get_available_drivers()
+    if not codes:
+        return {'status': 'failed', 'error': "no drivers in session"}
+    loaded, no_data, failed = {}, {}, {}
+    for mode in modes:
+        # One driver at a time: sessions are already spread over processes
+        loader.load_all_drivers(codes, mode, workers=1)
+        status = loader.load_status
+        loaded[mode] = sum(status[code] == LOADED for code in codes)
+        no_data[mode] = [code for code in codes if status[code] == NO_DATA]
+        failed[mode] = [code for code in codes if status[code] == FAILED]
+
+    if loader.get_reference_track() is None:
+        return {'status': 'failed', 'error': "no reference track", 'loaded': loaded}
+    
+    # Drivers whose load raised (often a dropped connection) are retried on the
+    # next run; those with no telemetry (a DNS, no valid lap) never will have any
+    no_data = {mode: missing for mode, missing in no_data.items() if missing}
+    failed = [f"{mode} {', '.join(broken)}" for mode, broken in failed.items() if broken]
+    if failed:
+        return {'status': 'partial', 'error': f"failed to load {'; '.join(failed)}",
+                'drivers': len(codes), 'loaded': loaded, 'no_data': no_data}
+    return {'status': 'done', 'drivers': len(codes), 'loaded': loaded, 'no_data': no_data,
+            'seconds': round(time.time() - start, 1)}
+
+
+def session_key(year, round_number, session_type, modes):
+    return f"{year}/{round_number:02d}/{session_type}/{'+'.join(sorted(modes))}"
+
+
+class Progress:
+    #Per-session results kept in a JSON file, rewritten atomically after each one
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.sessions = json.load(f)
+        except (OSError, ValueError):
+            self.sessions = {}
+
+    def done(self, key):
+        return self.sessions.get(key, {}).get('status') == 'done'
+
+    def record(self, key, entry):
+        self.sessions[key] = entry
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump(self.sessions, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def season_rounds(year):
+    """Round numbers of a season from the FastF1 schedule (1-24 if unavailable)"""
+    try:
+        import fastf1
+        schedule = fastf1.get_event_schedule(year, include_testing=False)
+        return sorted(int(r) for r in schedule["RoundNumber"] if r > 0)
+    except Exception as e:
+        logger.warning(f"Could not read the {year} schedule, trying rounds 1-24: {e}")
+        return list(range(1, 25))
+
+
+def parse_rounds(text):
+    """'1-5,8,10-12' -> [1, 2, 3, 4, 5, 8, 10, 11, 12]"""
+    rounds = set()
+    for part in text.split(","):
+        first, _, last = part.strip().partition("-")
+        rounds.update(range(int(first), int(last or first) + 1))
+    return sorted(rounds)
+
+
+def parse_choices(text, choices):
+    values = [v.strip().upper() for v in text.split(",") if v.strip()]
+    invalid = [v for v in values if v not in choices]
+    if invalid:
+        raise argparse.ArgumentTypeError(f"invalid {', '.join(invalid)} (choose from {', '.join(choices)})")
+    return values
+
+
+def warm_season(year, rounds, session_types, modes, workers=WARM_WORKERS,
+                progress_path=WARM_PROGRESS_FILE, force=False):
+    """Preprocess every (round, session) on at most `workers` processes; returns failures
+
+    Sessions are marked done once every driver loaded or has no telemetry;
+    failed ones, and partial ones where a driver's load raised, are tried
+    again on the next run.
+    """
+    progress = Progress(progress_path)
+    tasks = [(year, r, s) for r in rounds for s in session_types]
+    pending = [task for task in tasks
+               if force or not progress.done(session_key(*task, modes))]
+    skipped = len(tasks) - len(pending)
+    print(f" {len(tasks)} sessions, {skipped} already done, {len(pending)} to warm "
+          f"on {workers} processes")
+
+    failures = 0
+    if not pending:
+        return failures
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(logging.WARNING,)) as executor:
+        futures = {executor.submit(warm_session, *task, modes): task for task in pending}
+        for count, future in enumerate(as_completed(futures), 1):
+            year, round_number, session_type = futures[future]
+            key = session_key(year, round_number, session_type, modes)
+            try:
+                entry = future.result()
+            except Exception as e:
+                entry = {'status': 'failed', 'error': str(e)}
+            progress.record(key, entry)
+
+            if entry['status'] == 'done':
+                loaded = ", ".join(f"{m} {n}/{entry['drivers']}" for m, n in entry['loaded'].items())
+                no_data = "".join(f", no {m} data for {', '.join(c)}" for m, c in entry['no_data'].items())
+                print(f" [{count}/{len(pending)}] {key}: {loaded} drivers in {entry['seconds']}s{no_data}")
+            else:
+                failures += 1
+                print(f" [{count}/{len(pending)}] {key}: {entry['status']} ({entry['error']})")
+    return failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fill the telemetry caches for a season")
+    parser.add_argument("year", type=int, help="season year")
+    parser.add_argument("--rounds", type=parse_rounds, metavar="RANGE",
+                        help="rounds such as 1-10 or 3,5,7-9 (default: the whole season)")
+    parser.add_argument("--sessions", default=["R"], metavar="TYPES",
+                        type=lambda text: parse_choices(text, SESSION_TYPES),
+                        help=f"comma-separated session types from {','.join(SESSION_TYPES)} (default R)")
+    parser.add_argument("--modes", default=["RACE"], metavar="MODES",
+                        type=lambda text: parse_choices(text, REPLAY_MODES),
+                        help="comma-separated replay modes, RACE and/or FASTEST (default RACE)")
+    parser.add_argument("--workers", type=int, default=WARM_WORKERS,
+                        help=f"sessions processed at once (default {WARM_WORKERS})")
+    parser.add_argument("--progress", default=WARM_PROGRESS_FILE, metavar="FILE",
+                        help=f"progress file used to resume (default {WARM_PROGRESS_FILE})")
+    parser.add_argument("--force", action="store_true",
+                        help="redo sessions already marked done")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    args = parse_args(argv)
+    rounds = args.rounds or season_rounds(args.year)
+
+    print(f"\n Warming caches for {args.year} rounds {rounds[0]}-{rounds[-1]}: "
+          f"sessions {','.join(args.sessions)}, modes {','.join(args.modes)}")
+    try:
+        failures = warm_season(args.year, rounds, args.sessions, args.modes,
+                               max(args.workers, 1), args.progress, args.force)
+    except KeyboardInterrupt:
+        print("\n Interrupted; run again to resume")
+        return 130
+
+    if failures:
+        print(f"\n {failures} sessions failed or incomplete; run again to retry them")
+        return 1
+    print("\n All sessions cached")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())